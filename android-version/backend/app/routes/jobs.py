@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import db, User, CrackingJob, UserStatistics
 from datetime import datetime
-from app.services.cracker import submit_cracking_job
+from app.services.cracker import submit_cracking_job, detect_hash_type
 
 jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
 
@@ -147,17 +147,3 @@ def delete_job(job_id):
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
-
-
-def detect_hash_type(hash_value):
-    """Detect hash type from hash value"""
-    if hash_value.startswith("$2y$") or hash_value.startswith("$2b$"):
-        return "bcrypt"
-    elif len(hash_value) == 32:
-        return "md5"
-    elif len(hash_value) == 40:
-        return "sha1"
-    elif len(hash_value) == 64:
-        return "sha256"
-    else:
-        return "unknown"
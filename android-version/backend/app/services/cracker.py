@@ -1,11 +1,20 @@
-import hashlib
-import bcrypt
+import sys
 from app.models import db, CrackingJob, UserStatistics
 from datetime import datetime
 import os
 import threading
 
+# Hash engines live in the cracksmith package shared with the terminal cracker
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..'))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+from cracksmith.engines import get_engine, detect_hash_type as detect_type
+from cracksmith.hashfile import normalize
+from cracksmith.potfile import Potfile
+
 DEFAULT_WORDLIST = os.path.join(os.path.dirname(__file__), '..', '..', 'wordlists', 'common.txt')
+POTFILE = os.environ.get('POTFILE') or os.path.join(os.path.dirname(__file__), '..', '..', 'cracksmith.pot')
+BATCH_SIZE = 1024
 
 # Thread-safe job processing
 _job_threads = {}
@@ -43,12 +52,29 @@ def process_job(job_id):
     if not job:
         return
     
+    potfile = None
     try:
         # Update job status
         job.status = 'processing'
         job.started_at = datetime.utcnow()
         db.session.commit()
         
+        # Hashes cracked before (by any job or the terminal cracker) need no work
+        potfile = Potfile(POTFILE)
+        known = potfile.lookup([job.hash_value]).get(job.hash_value)
+        if known is not None:
+            job.status = 'completed'
+            job.result = known
+            job.attempts = 0
+            job.completed_at = datetime.utcnow()
+            
+            user_stats = UserStatistics.query.filter_by(user_id=job.user_id).first()
+            if user_stats:
+                user_stats.successful_cracks += 1
+                user_stats.total_hashes_cracked += 1
+            db.session.commit()
+            return
+        
         # Get wordlist path
         wordlist_path = DEFAULT_WORDLIST
         
@@ -71,6 +97,7 @@ def process_job(job_id):
             job.status = 'completed'
             job.result = result['password']
             job.attempts = result['attempts']
+            potfile.add(job.hash_value, result['password'])
             
             # Update user statistics
             user_stats = UserStatistics.query.filter_by(user_id=job.user_id).first()
@@ -96,61 +123,43 @@ def process_job(job_id):
         job.status = 'failed'
         job.completed_at = datetime.utcnow()
         db.session.commit()
+    finally:
+        if potfile:
+            potfile.close()
 
 
 def crack_hash(hash_value, hash_type, wordlist):
     """Attempt to crack a hash using a wordlist"""
-    attempts = 0
+    engine_cls = get_engine(hash_type)
+    if engine_cls is None:
+        return None
     
-    for password in wordlist:
-        attempts += 1
-        
-        try:
-            if check_hash(password, hash_value, hash_type):
-                return {
-                    'password': password,
-                    'attempts': attempts
-                }
-        except Exception as e:
-            print(f"Error checking password: {e}")
-            continue
+    # The target is parsed once; candidates are verified in batches
+    engine = engine_cls([hash_value.encode('utf-8')])
+    candidates = [password.encode('utf-8') for password in wordlist]
+    
+    for start in range(0, len(candidates), BATCH_SIZE):
+        if not engine.pending:
+            break
+        hits = engine.verify_many(candidates[start:start + BATCH_SIZE])
+        if hits:
+            index = start + hits[0][0]
+            return {
+                'password': wordlist[index],
+                'attempts': index + 1
+            }
     
     return None
 
 
 def check_hash(password, hash_value, hash_type):
     """Check if a password matches a hash"""
-    password_bytes = password.encode('utf-8')
-    
-    if hash_type == 'bcrypt':
-        # Normalize bcrypt hash
-        normalized_hash = hash_value.replace('$2y$', '$2b$').encode('utf-8')
-        try:
-            return bcrypt.checkpw(password_bytes, normalized_hash)
-        except Exception:
-            return False
-    
-    elif hash_type == 'md5':
-        return hashlib.md5(password_bytes).hexdigest() == hash_value
-    
-    elif hash_type == 'sha1':
-        return hashlib.sha1(password_bytes).hexdigest() == hash_value
-    
-    elif hash_type == 'sha256':
-        return hashlib.sha256(password_bytes).hexdigest() == hash_value
-    
-    return False
+    engine_cls = get_engine(hash_type)
+    if engine_cls is None:
+        return False
+    return bool(engine_cls([hash_value.encode('utf-8')]).verify_many([password.encode('utf-8')]))
 
 
 def detect_hash_type(hash_value):
     """Detect the type of hash"""
-    if hash_value.startswith('$2y$') or hash_value.startswith('$2b$'):
-        return 'bcrypt'
-    elif len(hash_value) == 32:
-        return 'md5'
-    elif len(hash_value) == 40:
-        return 'sha1'
-    elif len(hash_value) == 64:
-        return 'sha256'
-    else:
-        return 'unknown'
+    return detect_type(normalize(hash_value.strip().encode('utf-8')))
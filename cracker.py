@@ -3,25 +3,25 @@
 
 # CrackSmith - Terminal Hash Cracker
 
-import os, sys, json, time, signal, queue, bcrypt, psutil, threading, argparse, hashlib, requests
+import os, sys, json, time, signal, threading, argparse
 from datetime import timedelta, datetime
-from rich.console import Console, Group
-from rich.panel import Panel
-from rich.table import Table
-from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn
-from rich.text import Text
-from rich.live import Live
-from itertools import cycle
+# Only what every run needs is imported here; each mode imports its own modules
+# when it runs, so --version, workers and short runs start fast
+from cracksmith import __version__
+from cracksmith.metrics import Counters, SystemSampler
+from cracksmith.progress import PlainConsole, JsonlProgress
 
 # === Configuration ===
 DEFAULT_WORDLIST = "rockyou.txt"
 RESUME_FILE = "resume.json"
 REPORT_HTML = "crack_report.html"
-spinner = cycle(["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"])
-console = Console()
+console = PlainConsole()  # Replaced by a Rich console unless running headless
 stop_flag = False
 MAX_THREADS = os.cpu_count() or 4
 THREAD_COUNT = 4
+CHUNK_SIZE = None
+CHECKPOINT_INTERVAL = 10.0
+ENGINE = "thread"
 
 # Handle Ctrl+C
 signal.signal(signal.SIGINT, lambda sig, frame: stop())
@@ -31,205 +31,508 @@ def stop():
     console.print("\n[red]🛑 Cracking halted by user.[/red]")
 
 class CrackerStats:
-    def __init__(self):
+    def __init__(self, targets=1, counters=None, sampler=None):
         self.start_time = time.time()
-        self.attempts = 0
+        self.counters = counters or Counters()
+        self.sampler = sampler
         self.last_passwords = []
         self.total_passwords = 0
-        self.cpu_usage = 0
-        self.mem_usage = 0
-        self.gpu_usage = 0
+        self.skipped = 0
         self.found = False
-        self.has_gpu = False
-        try:
-            from pynvml import nvmlInit
-            nvmlInit()
-            self.has_gpu = True
-        except:
-            pass
-
-    def update(self, password):
-        self.attempts += 1
-        if self.attempts % 1000 == 0:
-            clean = password.decode('utf-8', 'ignore')[:25]
+        self.found_offset = 0
+        self.targets = targets
+        self.cracked = {}
+        self.lock = threading.Lock()
+
+    def update(self, slot, passwords):
+        if not passwords: return
+        before = self.counters.add(slot, len(passwords))
+        if (before + len(passwords)) // 1000 != before // 1000:
+            clean = passwords[-1].decode('utf-8', 'ignore')[:25]
             self.last_passwords = [clean] + self.last_passwords[:3]
-        self.cpu_usage = psutil.cpu_percent()
-        self.mem_usage = psutil.virtual_memory().percent
 
+    def record(self, target, password, offset):
+        with self.lock:
+            if target in self.cracked: return
+            self.cracked[target] = password
+            self.found, self.found_offset = password, offset
+
+    @property
+    def attempts(self): return self.counters.total()
+    @property
+    def cpu_usage(self): return self.sampler.cpu if self.sampler else 0
+    @property
+    def mem_usage(self): return self.sampler.mem if self.sampler else 0
+    @property
+    def gpu_usage(self): return self.sampler.gpu if self.sampler else 0
+    @property
+    def has_gpu(self): return bool(self.sampler and self.sampler.has_gpu)
+    @property
+    def done(self): return len(self.cracked) >= self.targets
     @property
     def elapsed(self): return time.time() - self.start_time
     @property
     def rate(self): return self.attempts / self.elapsed if self.elapsed > 0 else 0
     @property
+    def left(self): return self.total_passwords - self.skipped - self.attempts
+    @property
+    def eta_seconds(self):
+        if self.rate == 0 or self.total_passwords == 0: return None
+        return int(max(0, self.left) / self.rate)
+    @property
     def eta(self):
-        if self.rate == 0 or self.total_passwords == 0: return "∞"
-        return str(timedelta(seconds=int((self.total_passwords - self.attempts) / self.rate)))[:15]
-
-def detect_hash_type(h):
-    h = h.decode() if isinstance(h, bytes) else h
-    if h.startswith("$2y$") or h.startswith("$2b$"): return "bcrypt"
-    if len(h) == 32: return "md5"
-    if len(h) == 40: return "sha1"
-    if len(h) == 64: return "sha256"
-    return "unknown"
-
-def render_stats(stats, spinner_char, hash_type):
-    header = Panel(Text(f"{spinner_char} CrackSmith", justify="center", style="bold red"), expand=False)
-    info = Table.grid(expand=True)
-    info.add_column(justify="right", style="bold")
-    info.add_column()
-    info.add_row("Hash Type:", hash_type)
-    info.add_row("Wordlist:", WORDLIST_FILE)
-
-    stats_table = Table.grid(expand=True)
-    stats_table.add_column(justify="right", style="cyan")
-    stats_table.add_column()
-    stats_table.add_row("Attempts:", f"{stats.attempts:,}")
-    stats_table.add_row("Left:", f"{max(0, stats.total_passwords - stats.attempts):,}")
-    stats_table.add_row("Speed:", f"{stats.rate:,.1f}/s")
-    stats_table.add_row("Threads:", f"{THREAD_COUNT} / {MAX_THREADS}")
-    stats_table.add_row("Elapsed:", str(timedelta(seconds=int(stats.elapsed)))[:10])
-    stats_table.add_row("ETA:", stats.eta)
-
-    system = Table.grid(); system.add_column()
-    load = f"CPU {stats.cpu_usage:.1f}% | RAM {stats.mem_usage:.1f}%"
-    if stats.has_gpu: load += f" | GPU {stats.gpu_usage:.1f}%"
-    system.add_row(f"[green]{load}[/green]")
-
-    sample = Panel(Text("\n".join([f"→ {p}" for p in stats.last_passwords]) or "(no samples yet)", style="yellow"), title="Last Attempts")
-    progress = Progress(TextColumn("[progress.description]{task.description}"), BarColumn(), TextColumn("[progress.percentage]{task.percentage:>3.1f}%"), TimeRemainingColumn())
-    task = progress.add_task("Cracking", total=stats.total_passwords, completed=stats.attempts)
-
-    return Group(header, info, stats_table, system, progress, sample), progress, task
-
-def load_wordlist(stats, q):
-    try:
-        with open(WORDLIST_FILE, 'rb') as f:
-            lines = f.readlines()
-            stats.total_passwords = len(lines)
-            for i, line in enumerate(lines): q.put((i, line.strip()))
+        return "∞" if self.eta_seconds is None else str(timedelta(seconds=self.eta_seconds))[:15]
+
+def load_wordlist():
+    from cracksmith.wordlist import open_wordlist
+    try: return open_wordlist(WORDLIST_FILE)
     except Exception as e:
         console.print(f"[red]❌ Error loading wordlist:[/red] {e}"); sys.exit(1)
 
-def worker(stats, q, htype, target_hash):
-    nhash = target_hash.replace(b"$2y$", b"$2b$") if htype == "bcrypt" else target_hash
-    while not q.empty() and not stats.found and not stop_flag:
-        try:
-            i, pwd = q.get_nowait()
-            pstr = pwd.decode('utf-8', 'ignore')
-            match = False
-            if htype == "bcrypt": match = bcrypt.checkpw(pwd, nhash)
-            elif htype == "md5": match = hashlib.md5(pwd).hexdigest() == nhash.decode()
-            elif htype == "sha1": match = hashlib.sha1(pwd).hexdigest() == nhash.decode()
-            elif htype == "sha256": match = hashlib.sha256(pwd).hexdigest() == nhash.decode()
-            if match: stats.found = pstr; save_resume(i); return
-            stats.update(pwd)
-        except queue.Empty: break
-
-def save_resume(i): json.dump({"last_index": i}, open(RESUME_FILE, "w"))
-def load_resume(): return json.load(open(RESUME_FILE)).get("last_index", 0) if os.path.exists(RESUME_FILE) else 0
-
-def export_html_report(stats, hash_type):
+def show_schedule(jobs, source, fanout, limit=20):
+    from cracksmith.engines import get_engine
+    # Workers add up to the core count, and thread workers only when the hash releases the GIL
+    cores = max(1, min(THREAD_COUNT, os.cpu_count() or 1))
+    def seconds(job):
+        engine = get_engine(job[0][0])
+        est = engine.estimate([h for _, h in job])
+        return None if est is None else est / (cores if ENGINE == "process" or engine.parallel else 1)
+    estimates = [(job, seconds(job)) for job in jobs if get_engine(job[0][0])]
+    estimates = [(job, est) for job, est in estimates if est is not None]
+    if not estimates: return
+    # Counting lines may take a newline scan or a whole decompression pass, so it is never waited for
+    total = source.total
+    worst = lambda lines: timedelta(seconds=int(sum(est for _, est in estimates) * lines * fanout))
+    candidates = total * fanout if total is not None else 1_000_000
+    each = f"{total * fanout:,} candidates each" if total is not None else "per 1M candidates until the wordlist is counted"
+    console.print(f"[cyan]⏱️ {len(estimates):,} salted jobs, cheapest first ({each}):[/cyan]")
+    for job, est in estimates[:limit]:
+        console.print(f"  {job[0][0]} {job[0][1][:29].decode()}  {len(job):,} hashes  ~{timedelta(seconds=int(est * candidates))}")
+    if len(estimates) > limit: console.print(f"  … {len(estimates) - limit:,} more")
+    if total is not None:
+        console.print(f"[cyan]  Worst case ~{worst(total)} in total[/cyan]")
+        return
+    def counted(lines):
+        if source.total is None: return  # Compressed lists report running estimates first
+        console.print(f"[cyan]⏱️ Wordlist counted: {lines * fanout:,} candidates per salted job, worst case ~{worst(lines)} in total[/cyan]")
+    source.count_async(counted)
+
+def worker(stats, dispatcher, matcher, slot, log, profiler=None):
+    def found(target, pwd, offset): stats.record(target, pwd.decode('utf-8', 'ignore'), offset)
+    def update(pwds, chunk):
+        stats.update(slot, pwds)
+        log.complete(chunk.start, chunk.end)
+    next_chunk = dispatcher.next_chunk
+    if profiler:
+        next_chunk = profiler.next_chunk(slot, dispatcher)
+        matcher, found, update = (profiler.wrap(slot, stage, fn) for stage, fn in (("hash", matcher), ("record", found), ("update", update)))
+    while not stats.done and not stop_flag:
+        chunk = next_chunk()
+        if chunk is None: break
+        pwds = chunk.candidates
+        for j, target in matcher(pwds):
+            found(target, pwds[j], dispatcher.source.line_offset(chunk.offset, j // chunk.fanout))
+            if stats.done: pwds = pwds[:j + 1]; break
+        update(pwds, chunk)
+
+def show_profile(totals, run, dump, cprofile):
+    from cracksmith.profiler import CPROFILE_TOP, breakdown, write_dump
+    console.print(f"[cyan]🔬 Stage breakdown ({run['attempts']:,} attempts in {run['elapsed']:.2f}s):[/cyan]")
+    console.print(f"  {'stage':<11}{'':<34}{'seconds':>10}{'calls':>12}{'µs/call':>11}{'share':>8}")
+    for stage, description, seconds, calls, per_call, share in breakdown(totals):
+        console.print(f"  {stage:<11}{description:<34}{seconds:>10.3f}{calls:>12,}{per_call:>11.1f}{share:>7.1f}%")
+    try:
+        write_dump(dump, totals, run)
+        console.print(f"[cyan]📄 Profile written to {dump}[/cyan]")
+    except OSError as e:
+        console.print(f"[red]❌ Error writing profile:[/red] {e}")
+    stats = cprofile.save() if cprofile else None
+    if stats:
+        console.print(f"[cyan]📄 cProfile stats written to {cprofile.path}, top {CPROFILE_TOP} by cumulative time:[/cyan]")
+        stats.stream = sys.stderr if console.__class__ is PlainConsole else sys.stdout
+        stats.sort_stats("cumulative").print_stats(CPROFILE_TOP)
+
+def export_html_report(runs, hashlist=None):
+    import html
+    from cracksmith.engines import detect_hash_type
+    cracked = [(target, pwd) for stats, _ in runs for target, pwd in stats.cracked.items()]
+    users = hashlist.users(t for t, _ in cracked) if hashlist else {}
+    def owners(target):
+        names = users.get(target, [])
+        listed = ", ".join(html.escape(n) for n in names[:10]) + (f" and {len(names) - 10:,} more" if len(names) > 10 else "")
+        return f" <em>{listed}</em>" if names else ""
+    found = "".join(f"<li><strong>Password:</strong> {html.escape(pwd)} <code>{html.escape(target.decode())}</code> ({html.escape((hashlist and hashlist.types.get(target)) or detect_hash_type(target))}){owners(target)}</li>\n"
+                    for target, pwd in cracked)
+    attempts, elapsed = sum(s.attempts for s, _ in runs), sum(s.elapsed for s, _ in runs)
     with open(REPORT_HTML, "w") as f:
         f.write(f"""
 <html><head><title>CrackSmith Report</title></head>
 <body><h2>CrackSmith Report</h2><ul>
-<li><strong>Password:</strong> {stats.found}</li>
-<li><strong>Attempts:</strong> {stats.attempts:,}</li>
-<li><strong>Elapsed:</strong> {str(timedelta(seconds=int(stats.elapsed)))}</li>
-<li><strong>Hash Type:</strong> {hash_type}</li>
+{found}<li><strong>Attempts:</strong> {attempts:,}</li>
+<li><strong>Elapsed:</strong> {str(timedelta(seconds=int(elapsed)))}</li>
+<li><strong>Hash Type:</strong> {html.escape(", ".join(sorted({t for _, t in runs})))}</li>
 <li><strong>Date:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</li>
 </ul></body></html>
 """)
 
-def send_discord_embed(stats, hash_type, settings):
-    webhook = settings.get("discord_webhook")
-    if not webhook: return
-    embed = {
-        "title": "🔐 CrackSmith Success",
-        "description": "Password cracked successfully!",
-        "color": 3066993,
-        "fields": [
-            {"name": "Password", "value": f"`{stats.found}`", "inline": False},
-            {"name": "Attempts", "value": f"{stats.attempts:,}", "inline": True},
-            {"name": "Elapsed", "value": str(timedelta(seconds=int(stats.elapsed))), "inline": True},
-            {"name": "ETA", "value": stats.eta, "inline": True}
-        ],
-        "footer": {"text": "CrackSmith by Lovsan"},
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    if settings.get("discord_embed_logo"):
-        embed["thumbnail"] = {"url": settings["discord_embed_logo"]}
-    try:
-        requests.post(webhook, json={"embeds": [embed]})
-        console.print("[blue]💬 Discord embed sent![/blue]")
-    except Exception as e:
-        console.print(f"[red]⚠️ Discord webhook failed:[/red] {e}")
+def job_event(stats, hash_type):
+    return {"event": "cracked", "hash_type": hash_type, "cracked": {t.decode(): p for t, p in stats.cracked.items()},
+            "attempts": stats.attempts, "elapsed": round(stats.elapsed, 1), "eta": stats.eta}
+
+def run_benchmark(args):
+    from cracksmith import benchmark
+    baseline = None
+    if args.bench_compare:
+        try:
+            with open(args.bench_compare) as f: baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]❌ Error loading baseline:[/red] {e}"); sys.exit(1)
+    console.print(f"[cyan]⏱️ Benchmarking up to {MAX_THREADS} workers, {args.bench_duration:g}s per case[/cyan]")
+    def report(r):
+        if r.get("error"): console.print(f"  [red]{r['name']:<24} failed: {r['error']}[/red]")
+        elif r["kind"] == "startup": console.print(f"  {r['name']:<24} {r['ms']:>14,.1f} ms  ({r['overhead_ms']:+,.1f} ms over a bare interpreter)")
+        else: console.print(f"  {r['name']:<24} {r['rate']:>16,.0f}/s" + (f"  {r['mb_s']:,.1f} MB/s" if "mb_s" in r else ""))
+    doc = benchmark.run_suite(MAX_THREADS, args.bench_duration, WORDLIST_FILE, report, script=os.path.abspath(__file__))
+    benchmark.save(doc, args.bench_output)
+    console.print(f"[green]📄 Benchmark results saved to {args.bench_output}[/green]")
+    failed = sum(1 for r in doc["results"] if r.get("error"))
+    if failed: console.print(f"[yellow]⚠️ {failed:,} cases failed and are not usable as a baseline[/yellow]")
+    if baseline is None: return
+    rows = benchmark.compare(doc, baseline, args.bench_threshold / 100)
+    for name, base, rate, change, regressed in rows:
+        color = "red" if regressed else "green" if change > 0 else "white"
+        console.print(f"  [{color}]{name:<24} {base:>16,.0f} → {rate:>16,.0f}/s  {change:+.1%}{'  REGRESSION' if regressed else ''}[/{color}]")
+    regressions = sum(1 for *_, regressed in rows if regressed)
+    if regressions:
+        console.print(f"[red]❌ {regressions:,} of {len(rows):,} cases regressed by more than {args.bench_threshold:g}%[/red]"); sys.exit(1)
+    console.print(f"[green]✅ No regressions in {len(rows):,} cases[/green]")
+
+def run_ranking(args, settings):
+    from cracksmith.engines import get_engine
+    from cracksmith.potfile import Potfile, DEFAULT_POTFILE
+    from cracksmith.ranking import rank_wordlist, split_holdout, train
+    passwords = [] if args.no_potfile else Potfile(args.potfile or settings.get("potfile", DEFAULT_POTFILE)).passwords()
+    training, holdout = split_holdout(passwords)
+    method = args.rank_by
+    if method != "frequency" and not training:
+        console.print(f"[yellow]⚠️ No cracked passwords in the potfile to train the {method} model, ranking by frequency[/yellow]")
+        method = "frequency"
+    t0 = time.perf_counter()
+    try: report = rank_wordlist(WORDLIST_FILE, args.rank_wordlist, train(method, training), holdout)
+    except OSError as e:
+        console.print(f"[red]❌ Error ranking wordlist:[/red] {e}"); sys.exit(1)
+    console.print(f"[green]📊 Ranked {report['kept']:,} candidates ({report['lines'] - report['kept']:,} duplicates removed) by {method}"
+                  f"{f' trained on {len(training):,} cracked passwords' if method != 'frequency' else ''} into {args.rank_wordlist} in {time.perf_counter() - t0:.2f}s[/green]")
+    if not report["evaluated"]:
+        if holdout: console.print(f"[yellow]⚠️ None of the {len(holdout):,} held-out potfile passwords are in the wordlist, no improvement to report[/yellow]")
+        return
+    before, after = report["mean_before"], report["mean_after"]
+    console.print(f"[cyan]📈 {report['evaluated']:,} of {len(holdout):,} held-out potfile passwords are in the list. Expected guesses to crack:[/cyan]")
+    change = f"{before / after:.1f}× fewer" if after < before else f"{after / before:.1f}× more guesses" if after > before else "no change"
+    console.print(f"  mean {before:,.0f} → {after:,.0f} ({change}), median {report['median_before']:,} → {report['median_after']:,}")
+    bcrypt_engine = get_engine("bcrypt")
+    if bcrypt_engine and bcrypt_engine.available():
+        per_guess = bcrypt_engine.estimate([bcrypt_engine.hash(b"calibrate", 10)]) / max(1, THREAD_COUNT)
+        console.print(f"  at bcrypt cost 10 with {THREAD_COUNT} workers: ~{timedelta(seconds=int(before * per_guess))} → ~{timedelta(seconds=int(after * per_guess))}")
 
 # === Menu and Execution ===
 def parse_args():
-    p = argparse.ArgumentParser()
+    # --version is answered before the full parser pulls in module defaults
+    early = argparse.ArgumentParser(add_help=False)
+    early.add_argument("--version", action="version", version=f"CrackSmith {__version__}")
+    early.parse_known_args()
+    from cracksmith.digestindex import INDEX_ALGOS
+    from cracksmith.distributed import DEFAULT_PORT
+    from cracksmith.potfile import DEFAULT_POTFILE
+    from cracksmith.ranking import MODELS
+    p = argparse.ArgumentParser(parents=[early])
     p.add_argument("--hash"); p.add_argument("--hashfile")
+    p.add_argument("--hash-type", help="treat every hash as this type instead of detecting it (e.g. ntlm)")
     p.add_argument("--wordlist", default=DEFAULT_WORDLIST)
+    p.add_argument("--compile-wordlist", metavar="OUT", help="compile --wordlist into a deduplicated binary wordlist and exit")
+    p.add_argument("--no-dedup", action="store_true", help="keep duplicate candidates when compiling")
+    p.add_argument("--rank-wordlist", metavar="OUT", help="write --wordlist ordered by likelihood into a compiled wordlist and exit")
+    p.add_argument("--rank-by", choices=list(MODELS), default="markov", help="ranking model trained on the potfile (default: markov)")
+    p.add_argument("--build-index", nargs="?", const=",".join(INDEX_ALGOS), metavar="ALGOS", help=f"build digest indexes of --wordlist and exit (default: {','.join(INDEX_ALGOS)})")
+    p.add_argument("--rules", help="hashcat-style rule file applied to every wordlist line")
+    p.add_argument("--mask", help="brute-force mask such as ?l?l?d?d?d instead of a wordlist")
+    for n in range(1, 5): p.add_argument(f"--custom-charset{n}", help=f"charset for ?{n} in --mask")
     p.add_argument("--resume", action="store_true")
+    p.add_argument("--checkpoint-interval", type=float, help="seconds between resume checkpoints (default: 10)")
     p.add_argument("--settings", default="settings.json")
+    p.add_argument("--potfile", help=f"file of already cracked hashes (default: {DEFAULT_POTFILE})")
+    p.add_argument("--no-potfile", action="store_true")
     p.add_argument("--test", action="store_true")
-    p.add_argument("--benchmark", action="store_true")
+    p.add_argument("--benchmark", action="store_true", help="benchmark every algorithm, engine and worker count")
+    p.add_argument("--bench-output", default="benchmark.json", help="where to write benchmark results")
+    p.add_argument("--bench-compare", metavar="BASELINE", help="flag throughput regressions against saved benchmark results")
+    p.add_argument("--bench-duration", type=float, default=1.0, help="seconds measured per benchmark case")
+    p.add_argument("--bench-threshold", type=float, default=10.0, help="slowdown in percent reported as a regression")
+    p.add_argument("--engine", choices=["thread", "process"])
+    p.add_argument("--serve", nargs="?", const=str(DEFAULT_PORT), metavar="[HOST:]PORT", help=f"coordinate remote workers instead of cracking locally (default port {DEFAULT_PORT})")
+    p.add_argument("--join", metavar="HOST:PORT", help="work for a --serve coordinator")
+    p.add_argument("--token", default=os.environ.get("CRACKSMITH_TOKEN"), help="shared secret of --serve and --join (default: $CRACKSMITH_TOKEN; --serve generates one if unset)")
+    p.add_argument("--autotune", action="store_true", help="calibrate engine, workers and chunk size per algorithm (cached per host)")
+    p.add_argument("--profile", nargs="?", const="profile.json", metavar="OUT", help="time every worker and main-loop stage and write the breakdown as JSON (default: profile.json)")
+    p.add_argument("--cprofile", metavar="OUT", help="also run every worker under cProfile and write merged pstats to OUT")
+    p.add_argument("--progress", choices=["rich", "jsonl"], default="rich")
+    p.add_argument("--headless", action="store_true", help="same as --progress jsonl")
+    p.add_argument("--progress-file", help="write JSON-lines progress here instead of stdout")
+    p.add_argument("--progress-interval", type=float, default=2.0)
     return p.parse_args()
 
 def main():
     args = parse_args()
     settings = json.load(open(args.settings)) if os.path.exists(args.settings) else {}
-    global THREAD_COUNT, WORDLIST_FILE
+    global THREAD_COUNT, WORDLIST_FILE, CHUNK_SIZE, ENGINE, CHECKPOINT_INTERVAL, console
     THREAD_COUNT = settings.get("threads", THREAD_COUNT)
+    CHUNK_SIZE = settings.get("chunk_size", CHUNK_SIZE)
+    ENGINE = args.engine or settings.get("engine", ENGINE)
+    CHECKPOINT_INTERVAL = args.checkpoint_interval or settings.get("checkpoint_interval", CHECKPOINT_INTERVAL)
     WORDLIST_FILE = args.wordlist
+    headless = args.headless or args.progress == "jsonl"
+    if headless:
+        progress_out = open(args.progress_file, "a") if args.progress_file else sys.stdout
+        make_view = lambda stats, hash_type, run: JsonlProgress(stats, hash_type, run, progress_out, args.progress_interval)
+    else:
+        from cracksmith.ui import LiveView, make_console
+        console, make_view = make_console(), LiveView
+    from cracksmith.engines import FAST_HASHES, EngineSet, get_engine, load_plugins
+    for name, error in load_plugins(settings.get("plugins", [])).items():
+        console.print(f"[yellow]⚠️ Plugin {name} failed to load:[/yellow] {error}")
+    if args.hash_type and not get_engine(args.hash_type):
+        console.print(f"[red]❌ Unknown hash type {args.hash_type}[/red]"); sys.exit(1)
 
     if args.test:
-        args.hash = bcrypt.hashpw(b"password123", bcrypt.gensalt()).decode()
+        args.hash = get_engine("bcrypt").hash(b"password123").decode()
         console.print(f"[cyan]Test hash for 'password123':[/cyan] {args.hash}")
 
-    if args.benchmark:
+    if args.compile_wordlist:
+        from cracksmith.compiled import compile_wordlist
         t0 = time.perf_counter()
-        for _ in range(10000): bcrypt.hashpw(b"bench", bcrypt.gensalt(4))
-        console.print(f"[green]Benchmark complete: {time.perf_counter() - t0:.2f}s for 10k hashes[/green]")
+        try: lines, kept = compile_wordlist(WORDLIST_FILE, args.compile_wordlist, dedup=not args.no_dedup)
+        except OSError as e:
+            console.print(f"[red]❌ Error compiling wordlist:[/red] {e}"); sys.exit(1)
+        console.print(f"[green]📦 Compiled {kept:,} candidates ({lines - kept:,} duplicates removed) into {args.compile_wordlist} in {time.perf_counter() - t0:.2f}s[/green]")
         return
 
-    hashes = []
+    if args.rank_wordlist:
+        run_ranking(args, settings)
+        return
+
+    if args.build_index:
+        from cracksmith.digestindex import build_indexes
+        t0 = time.perf_counter()
+        algos = [a.strip() for a in args.build_index.split(",") if a.strip()]
+        try: count = build_indexes(WORDLIST_FILE, algos, workers=MAX_THREADS)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]❌ Error building digest index:[/red] {e}"); sys.exit(1)
+        console.print(f"[green]🗂️ Indexed {count:,} candidates for {', '.join(algos)} in {time.perf_counter() - t0:.2f}s[/green]")
+        return
+
+    if args.benchmark:
+        run_benchmark(args)
+        return
+
+    if args.join:
+        from cracksmith.distributed import join, parse_address
+        log = lambda message: console.print(f"[blue]🌐 {message}[/blue]")
+        token = args.token or settings.get("token")
+        if not token:
+            console.print("[red]❌ --join needs the coordinator's --token (or CRACKSMITH_TOKEN)[/red]"); sys.exit(1)
+        try: join(parse_address(args.join), token, THREAD_COUNT, ENGINE, WORDLIST_FILE, log)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]❌ Distributed worker failed:[/red] {e}"); sys.exit(1)
+        console.print("[green]🌐 Coordinator finished, worker exiting[/green]")
+        return
+
+    from cracksmith.hashfile import HashList, read_hashfile
+    from cracksmith.potfile import Potfile, DEFAULT_POTFILE
+    from cracksmith.digestindex import lookup_many
+    from cracksmith.dispatch import ChunkDispatcher, chunk_size_for
+    from cracksmith.checkpoint import Checkpoint, RangeLog
+
+    # Dumps are parsed, normalized and deduplicated once, then cracked in per-algorithm batches
     if args.hashfile:
-        with open(args.hashfile) as f: hashes = [line.strip().encode() for line in f if line.strip()]
-    elif args.hash: hashes = [args.hash.encode()]
-    else: hashes = [b"$2y$10$eupC0REYlNINHdZ7ntJvEu.8dZiU4y/favMCCeDAVQe9WPkxzPRVK"]
-
-    for h in hashes:
-        hash_type = detect_hash_type(h)
-        stats = CrackerStats()
-        q = queue.Queue()
-        load_wordlist(stats, q)
-        if args.resume:
-            for _ in range(load_resume()): q.get_nowait()
-
-        threads = [threading.Thread(target=worker, args=(stats, q, hash_type, h)) for _ in range(THREAD_COUNT)]
-        [t.start() for t in threads]
-
-        with Live(render_stats(stats, next(spinner), hash_type)[0], refresh_per_second=5, screen=True) as live:
-            while any(t.is_alive() for t in threads):
+        t0 = time.perf_counter()
+        try: hashlist = read_hashfile(args.hashfile, args.hash_type)
+        except OSError as e:
+            console.print(f"[red]❌ Error loading hashfile:[/red] {e}"); sys.exit(1)
+        batches = ", ".join(f"{t} {len(b):,}" for t, b in hashlist.batches.items())
+        console.print(f"[cyan]📥 {len(hashlist):,} unique hashes from {hashlist.lines:,} lines in {time.perf_counter() - t0:.2f}s ({hashlist.duplicates:,} duplicates){': ' + batches if batches else ''}[/cyan]")
+    else: hashlist = HashList(hash_type=args.hash_type).feed([(args.hash or "$2y$10$eupC0REYlNINHdZ7ntJvEu.8dZiU4y/favMCCeDAVQe9WPkxzPRVK").encode()])
+    if hashlist.unrecognized:
+        console.print(f"[yellow]⚠️ {hashlist.unrecognized:,} unrecognized hashes skipped, e.g. {hashlist.examples[0]}[/yellow]")
+    unsupported = [t for t in hashlist.batches if not get_engine(t) or not get_engine(t).available()]
+    for hash_type in unsupported:
+        engine, n = get_engine(hash_type), len(hashlist.batches[hash_type])
+        if engine: console.print(f"[yellow]⚠️ {n:,} {hash_type} hashes skipped, install {engine.requires} to crack them[/yellow]")
+        else: console.print(f"[yellow]⚠️ {n:,} {hash_type} hashes skipped, no engine for this type[/yellow]")
+    hashlist.drop(h for t in unsupported for h in hashlist.batches[t])
+
+    # Known hashes are resolved from the potfile before any work starts
+    runs, potfile = [], None if args.no_potfile else Potfile(args.potfile or settings.get("potfile", DEFAULT_POTFILE))
+    if potfile:
+        known = potfile.lookup(h for _, h in hashlist.typed())
+        if known:
+            pot_stats = CrackerStats(len(known))
+            for h, pwd in known.items(): pot_stats.record(h, pwd, 0)
+            runs.append((pot_stats, "potfile"))
+            console.print(f"[blue]♻️ {len(known):,} hashes already in the potfile[/blue]")
+            if len(known) <= 20:
+                for h, pwd in known.items(): console.print(f"[green]✅ Password found: {pwd}[/green] [dim]{h.decode()}[/dim]")
+            hashlist.drop(known)
+
+    if not hashlist.batches:
+        if runs: export_html_report(runs, hashlist)
+        return
+
+    rules = None
+    if args.rules:
+        from cracksmith.rules import RuleSet
+        try: rules = RuleSet.load(args.rules)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]❌ Error loading rules:[/red] {e}"); sys.exit(1)
+    fanout = len(rules) if rules else 1
+
+    if args.mask:
+        from cracksmith.mask import Mask
+        try: source = Mask(args.mask, {n: getattr(args, f"custom_charset{n}") for n in range(1, 5)})
+        except ValueError as e:
+            console.print(f"[red]❌ Invalid mask:[/red] {e}"); sys.exit(1)
+    else: source = load_wordlist()
+
+    # Unsalted hashes resolve by binary search in a prebuilt digest index instead of a scan
+    if not args.mask and any(t in FAST_HASHES for t in hashlist.batches):
+        found, indexed = lookup_many(source, hashlist.typed())
+        if found:
+            idx_stats = CrackerStats(len(found))
+            for h, pwd in found.items(): idx_stats.record(h, pwd.decode('utf-8', 'ignore'), 0)
+            runs.append((idx_stats, "index"))
+            if potfile: potfile.add_many(idx_stats.cracked)
+            console.print(f"[blue]🗂️ {len(found):,} hashes resolved from the digest index[/blue]")
+            if len(found) <= 20:
+                for h, pwd in idx_stats.cracked.items(): console.print(f"[green]✅ Password found: {pwd}[/green] [dim]{h.decode()}[/dim]")
+        # Without rules the index covers every candidate, so a miss needs no scan either
+        missing = [h for t, batch in hashlist.batches.items() if t in indexed for h in batch if h not in found] if not rules else []
+        if missing:
+            console.print(f"[red]❌ {len(missing):,} hashes not in the wordlist (digest index)[/red]")
+        hashlist.drop([*found, *missing])
+
+    # Unsalted batches share one wordlist pass; salted ones are scheduled by their engine, cheapest first
+    fast = [(t, h) for t, batch in hashlist.batches.items() if t in FAST_HASHES for h in batch]
+    jobs = [fast] if fast else []
+    for hash_type, group in hashlist.batches.items():
+        if hash_type in FAST_HASHES: continue
+        scheduled = get_engine(hash_type).schedule(group)
+        skipped = len(group) - sum(map(len, scheduled))
+        if skipped: console.print(f"[yellow]⚠️ {skipped:,} malformed {hash_type} hashes skipped[/yellow]")
+        jobs += [[(hash_type, h) for h in job] for job in scheduled]
+    show_schedule(jobs, source, fanout)
+    if not jobs:
+        if any(stats.cracked for stats, _ in runs): export_html_report(runs, hashlist)
+        return
+
+    from cracksmith.notify import Notifier  # requests itself loads on the first delivery
+    notifier = Notifier.from_settings(settings, console.print)
+    coordinator = None
+    if args.serve:
+        from cracksmith.distributed import Coordinator, DistributedJob, parse_address
+        if getattr(source, "streaming", False):
+            console.print("[red]❌ Compressed wordlists cannot be split into leases, decompress or compile them first[/red]"); sys.exit(1)
+        log = lambda message: console.print(f"[yellow]🌐 {message}[/yellow]")
+        try: coordinator = Coordinator(parse_address(args.serve), args.token or settings.get("token"), log)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]❌ Cannot start coordinator:[/red] {e}"); sys.exit(1)
+        console.print(f"[blue]🌐 Coordinator listening on {coordinator.address[0]}:{coordinator.address[1]}, join with --join HOST:{coordinator.address[1]} --token {coordinator.token}[/blue]")
+        if args.mask: spec = {"mask": args.mask, "custom": {n: getattr(args, f"custom_charset{n}") for n in range(1, 5) if getattr(args, f"custom_charset{n}")}}
+        else: spec = {"wordlist": WORDLIST_FILE, "size": source.size, "digest": getattr(source, "digest", None)}
+    sampler = SystemSampler().start()
+    # Profiling swaps in timed stand-ins for worker and main-loop steps; off, nothing is wrapped
+    profile, cprofile = args.profile or (args.cprofile and "profile.json"), None
+    profile_totals, profile_run = None, {"attempts": 0, "elapsed": 0.0, "jobs": 0}
+    if profile:
+        from cracksmith.profiler import CProfileRun, Profiler
+        if args.cprofile: cprofile = CProfileRun(args.cprofile); cprofile.enable()
+    autotune = args.autotune or settings.get("autotune", False)
+    if autotune: from cracksmith.autotune import tuned
+    for targets in jobs:
+        hash_type = ", ".join(sorted({t for t, _ in targets}))
+        if autotune:
+            report = lambda engine, n, chunk, rate: console.print(f"[dim]  🎛️ {engine} × {n}, {chunk:,}-byte chunks: {rate:,.0f}/s[/dim]")
+            setup, cached = tuned([t for t, _ in targets], MAX_THREADS, report=report)
+            ENGINE, THREAD_COUNT, CHUNK_SIZE = setup["engine"], setup["workers"], setup["chunk_size"]
+            console.print(f"[cyan]🎛️ {'Cached' if cached else 'Tuned'} {hash_type}: {ENGINE} engine, {THREAD_COUNT} workers, {CHUNK_SIZE:,}-byte chunks (~{setup['rate']:,.0f}/s)[/cyan]")
+        checkpoint = Checkpoint(RESUME_FILE, source, targets, CHECKPOINT_INTERVAL, rules)
+        start, done, resumed, cracked = checkpoint.load() if args.resume else (0, [], 0, {})
+        # Rules multiply the work per line, so shrink chunks to keep them responsive
+        log, chunk = RangeLog(start, done), max(64 // source.unit, chunk_size_for(hash_type, CHUNK_SIZE) // (fanout * source.unit))
+        pending = [t for t in targets if t[1].decode() not in cracked]
+
+        if coordinator: pool = DistributedJob(coordinator, source, spec, pending, start, chunk, done, rules)
+        elif ENGINE == "process":
+            from cracksmith.procpool import ProcessPool
+            pool = ProcessPool(source, pending, THREAD_COUNT, start, chunk, done, rules, profile=bool(profile), cprofile=cprofile)
+        else: pool = None
+        profiler = (getattr(pool, "profiler", None) or Profiler(0 if pool else THREAD_COUNT)) if profile else None
+        stats = CrackerStats(len(targets), Counters(pool.counts if pool else THREAD_COUNT), sampler)
+        stats.skipped = resumed
+        for target, pwd in cracked.items(): stats.record(target.encode(), pwd, 0)
+        source.count_async(lambda n, s=stats: setattr(s, "total_passwords", n * fanout))
+        if pool:
+            pool.start(); alive = pool.alive
+        else:
+            dispatcher = ChunkDispatcher(source, start, chunk_size=chunk, done=done, rules=rules)
+            matcher = EngineSet(pending)
+            work = (lambda *a: cprofile.runcall(worker, *a)) if cprofile else worker
+            threads = [threading.Thread(target=work, args=(stats, dispatcher, matcher, i, log, profiler)) for i in range(THREAD_COUNT)]
+            [t.start() for t in threads]
+            alive = lambda: any(t.is_alive() for t in threads)
+
+        run = {"wordlist": f"mask {source.path}" if args.mask else WORDLIST_FILE, "engine": "distributed" if coordinator else ENGINE, "workers": THREAD_COUNT, "max_workers": MAX_THREADS,
+               "rules": f"{args.rules} ({fanout:,})" if rules else None,
+               "target": targets[0][1].decode() if len(targets) == 1 else None}
+        with make_view(stats, hash_type, run) as view:
+            refresh, save, render = pool.refresh if pool else None, checkpoint.maybe_save, view.update
+            if profiler:
+                refresh, save, render = (profiler.wrap(None, stage, fn) if fn else None for stage, fn in (("refresh", refresh), ("checkpoint", save), ("render", render)))
+            while alive():
                 if stop_flag: break
-                layout, progress, task = render_stats(stats, next(spinner), hash_type)
-                progress.update(task, completed=stats.attempts)
-                live.update(layout)
+                if pool: refresh(stats, log)
+                if coordinator: run["nodes"] = pool.nodes()
+                save(log, resumed + stats.attempts, stats.cracked)
+                render()
                 time.sleep(0.5)
-                if stats.found: break
+                if stats.done: break
+            if pool: pool.shutdown(stats, log)
+            else: dispatcher.close()
+            checkpoint.save(log, resumed + stats.attempts, stats.cracked)
+            view.finish("stopped" if stop_flag else "cracked" if stats.done else "exhausted")
 
-        if stats.found:
-            console.print(f"\n[bold green]✅ Password found: {stats.found}[/bold green]")
-            export_html_report(stats, hash_type)
-            send_discord_embed(stats, hash_type, settings)
-            break
-        elif stop_flag:
+        runs.append((stats, hash_type))
+        if profiler:
+            profile_totals = profiler.collect(profile_totals)
+            profile_run["attempts"] += stats.attempts; profile_run["elapsed"] += stats.elapsed; profile_run["jobs"] += 1
+        if stats.cracked:
+            if potfile: potfile.add_many(stats.cracked)
+            for target, pwd in stats.cracked.items():
+                console.print(f"\n[bold green]✅ Password found: {pwd}[/bold green]" + (f" [dim]{target.decode()}[/dim]" if stats.targets > 1 else ""))
+            if notifier: notifier.notify(job_event(stats, hash_type))
+        if stop_flag:
             console.print("[yellow]⏹️ Cracking stopped by user[/yellow]")
             break
-        else:
-            console.print(f"[red]❌ Not found in {stats.attempts:,} attempts[/red]")
+        if not stats.done:
+            left = stats.targets - len(stats.cracked)
+            console.print(f"[red]❌ Not found in {stats.attempts:,} attempts[/red]" if stats.targets == 1 else f"[red]❌ {left:,} hashes not found in {stats.attempts:,} attempts[/red]")
+
+    if coordinator: coordinator.close()
+    if profile_totals:
+        profile_run.update(engine="distributed" if coordinator else ENGINE, workers=THREAD_COUNT, wordlist=WORDLIST_FILE)
+        show_profile(profile_totals, profile_run, profile, cprofile)
+    if notifier:
+        notifier.close()
+        if notifier.dropped: console.print(f"[yellow]⚠️ {notifier.dropped:,} notifications dropped, queue full[/yellow]")
+    if any(stats.cracked for stats, _ in runs): export_html_report(runs, hashlist)
 
 if __name__ == "__main__":
     main()
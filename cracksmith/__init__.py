@@ -0,0 +1,4 @@
+"""
+CrackSmith core package shared by the terminal cracker and the backend
+"""
+__version__ = "1.0.0"
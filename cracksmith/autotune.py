@@ -0,0 +1,123 @@
+"""
+Startup calibration of engine, worker count and chunk size per host and algorithm
+
+A short run of the benchmark cases for the hash types of a job picks the
+fastest configuration, which is cached so later runs on the same host
+start tuned right away.
+"""
+import os
+import json
+import time
+import platform
+
+from cracksmith.benchmark import BENCH_MASK, KDF_COSTS, bench_processes, bench_threads, synthetic_target, worker_counts
+from cracksmith.dispatch import chunk_size_for
+from cracksmith.engines import get_engine
+from cracksmith.mask import Mask
+
+VERSION = 1
+CACHE_FILE = "autotune.json"
+TUNE_DURATION = 0.3
+# A KDF's cost only scales the time per candidate, so tuning at a low cost picks the same layout
+TUNE_BCRYPT_COST = 6
+TUNE_COSTS = {**KDF_COSTS, "bcrypt": TUNE_BCRYPT_COST}
+CHUNK_FACTORS = (0.25, 1, 4)
+MIN_GAIN = 0.05  # Stop adding workers once they gain less than this
+
+
+def tune_key(hash_types):
+    """Return the cache key for a set of hash types cracked together"""
+    return "+".join(sorted(set(hash_types)))
+
+
+def host_id():
+    """Describe the host so a cached tuning is not reused on other hardware"""
+    return {"host": platform.node(), "machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def calibrate(hash_types, max_workers, duration=TUNE_DURATION, report=None):
+    """Measure every engine and worker count for the hash types and return the best setup
+
+    Worker counts are tried in powers of two and stop growing once they
+    gain less than MIN_GAIN. Chunk sizes are then tried around the default
+    for unsalted hashes; salted ones keep small chunks for responsiveness.
+    """
+    hash_types = sorted(set(hash_types))
+    targets = [(t, synthetic_target(t, TUNE_COSTS.get(t))) for t in hash_types]
+    source = Mask(BENCH_MASK)
+    base = min(chunk_size_for(t) for t in hash_types)
+
+    def measure(engine, workers, chunk_bytes):
+        bench = bench_threads if engine == "thread" else bench_processes
+        rate = bench(source, targets, workers, max(64 // source.unit, chunk_bytes // source.unit), duration)
+        if report:
+            report(engine, workers, chunk_bytes, rate)
+        return rate
+
+    best = None
+    for engine in ("thread", "process"):
+        last = 0
+        for n in worker_counts(max_workers):
+            rate = measure(engine, n, base)
+            if best is None or rate > best["rate"]:
+                best = {"engine": engine, "workers": n, "chunk_size": base, "rate": rate}
+            if rate < last * (1 + MIN_GAIN):
+                break
+            last = rate
+    if not any(get_engine(t) and get_engine(t).salted for t in hash_types):
+        for factor in CHUNK_FACTORS:
+            chunk = int(base * factor)
+            if chunk == base:
+                continue
+            rate = measure(best["engine"], best["workers"], chunk)
+            if rate > best["rate"]:
+                best.update(chunk_size=chunk, rate=rate)
+    return best
+
+
+class TuneCache:
+    """JSON file of tuned setups keyed by host and hash types"""
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.data = json.load(f)
+            if self.data.get("version") != VERSION:
+                self.data = {}
+        except (OSError, ValueError):
+            self.data = {}
+        self.data.setdefault("version", VERSION)
+        self.data.setdefault("tunings", {})
+
+    def _key(self, hash_types):
+        return f"{platform.node()}|{tune_key(hash_types)}"
+
+    def get(self, hash_types):
+        """Return the cached setup for the hash types on this host, or None"""
+        entry = self.data["tunings"].get(self._key(hash_types))
+        if entry and entry.get("hardware") == host_id():
+            return entry
+        return None
+
+    def put(self, hash_types, setup):
+        """Store a setup and write the cache atomically"""
+        self.data["tunings"][self._key(hash_types)] = dict(setup, hardware=host_id(), tuned=time.time())
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+def tuned(hash_types, max_workers, path=CACHE_FILE, report=None):
+    """Return (setup, cached) for the hash types, calibrating on a cache miss"""
+    cache = TuneCache(path)
+    setup = cache.get(hash_types)
+    if setup is not None:
+        return setup, True
+    setup = calibrate(hash_types, max_workers, report=report)
+    try:
+        cache.put(hash_types, setup)
+    except OSError:
+        pass  # Tuning still applies to this run
+    return setup, False
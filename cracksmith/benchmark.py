@@ -0,0 +1,238 @@
+"""
+Benchmark suite for the real cracking path
+
+Every algorithm (bcrypt at several costs, other KDFs at cheap settings) is
+run through both engines at a range of worker counts against a synthetic
+target that is never found, so each case measures full-scan throughput. Wordlist reading is measured
+separately, as is start-up time (cracker --version and a worker
+process's imports). Results are plain JSON and can be compared against a saved
+baseline to flag regressions.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import subprocess
+import threading
+
+from cracksmith.compiled import compile_wordlist
+from cracksmith.dispatch import ChunkDispatcher, chunk_size_for
+from cracksmith.engines import ENGINES, FAST_HASHES, EngineSet, get_engine
+from cracksmith.mask import Mask
+from cracksmith.metrics import Counters
+from cracksmith.procpool import ProcessPool
+from cracksmith.wordlist import open_wordlist
+
+VERSION = 1
+BCRYPT_COSTS = (4, 6, 8)
+# Cheap settings for the other salted engines (rounds, or argon2 passes), like the low bcrypt costs
+KDF_COSTS = {"pbkdf2-sha256": 1000, "sha512crypt": 1000, "argon2": 1}
+# A keyspace no run exhausts, so the engines never idle during a case
+BENCH_MASK = "?a?a?a?a?a?a?a?a"
+IO_LINES = 1 << 20
+STARTUP_RUNS = 10
+# What a spawned process worker imports before it can hash, run from the checkout
+WORKER_IMPORTS = "import cracksmith.procpool"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_THRESHOLD = 0.10
+# Counters move once per finished chunk, so a reading spans at least this many chunks per worker
+MIN_CHUNKS = 4
+MAX_WINDOW = 30.0
+
+
+def worker_counts(max_workers):
+    """Return 1, 2, 4, ... up to and including max_workers"""
+    counts, n = [], 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    return counts + [max_workers]
+
+
+def synthetic_target(hash_type, cost=None):
+    """Return a hash of random bytes that no candidate will ever match"""
+    return get_engine(hash_type).hash(os.urandom(32).hex().encode(), cost)
+
+
+def _measure(total, duration, minimum=0, tick=None):
+    """Return the rate of a counter that grows by whole chunks, or 0.0 if it never moved
+
+    The window runs from the first change of the counter to the last one
+    seen, so it spans whole chunks, and is stretched past duration (up to
+    MAX_WINDOW) until it covers at least minimum counts.
+    """
+    deadline = time.perf_counter() + max(duration, 5.0)
+    while total() == 0 and time.perf_counter() < deadline:
+        time.sleep(0.01)  # Process start-up is not part of the throughput
+        if tick:
+            tick()
+    c0 = last = total()
+    t0 = t_last = now = time.perf_counter()
+    while now - t0 < MAX_WINDOW and (now - t0 < duration or last - c0 < minimum):
+        time.sleep(0.05)
+        if tick:
+            tick()
+        c, now = total(), time.perf_counter()
+        if c != last:
+            last, t_last = c, now
+    return (last - c0) / (t_last - t0) if last > c0 else 0.0
+
+
+def bench_threads(source, targets, workers, chunk, duration):
+    """Return candidates per second of the thread engine"""
+    dispatcher = ChunkDispatcher(source, chunk_size=chunk)
+    matcher, counts, stop = EngineSet(targets), Counters(workers), threading.Event()
+
+    def work(slot):
+        while not stop.is_set():
+            c = dispatcher.next_chunk()
+            if c is None:
+                break
+            matcher(c.candidates)
+            counts.add(slot, len(c.candidates))
+
+    threads = [threading.Thread(target=work, args=(i,), daemon=True) for i in range(workers)]
+    for t in threads:
+        t.start()
+    rate = _measure(counts.total, duration, MIN_CHUNKS * workers * chunk)
+    stop.set()
+    for t in threads:
+        t.join()
+    return rate
+
+
+def bench_processes(source, targets, workers, chunk, duration):
+    """Return candidates per second of the process engine"""
+    pool = ProcessPool(source, targets, workers, chunk_size=chunk)
+    pool.start()
+    try:
+        return _measure(lambda: sum(pool.counts), duration, MIN_CHUNKS * workers * chunk, pool.refresh)
+    finally:
+        pool.shutdown()
+
+
+def bench_io(path, duration):
+    """Return (lines per second, MB per second) of reading a wordlist in chunks"""
+    lines = size = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < duration:
+        with open_wordlist(path) as source:
+            for chunk in ChunkDispatcher(source):
+                lines += len(chunk.candidates)
+            size += os.path.getsize(path)
+    elapsed = time.perf_counter() - t0
+    return lines / elapsed, size / elapsed / 1e6
+
+
+def _launch_ms(args, runs):
+    """Return the median wall time in ms of running the interpreter with args"""
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - t0) * 1000)
+    return sorted(times)[len(times) // 2]
+
+
+def bench_startup(args, runs=STARTUP_RUNS):
+    """Return (starts per second, median ms, ms over a bare interpreter) of a command"""
+    ms = _launch_ms(args, runs)
+    return 1000 / ms, ms, ms - _launch_ms(["-c", "pass"], runs)
+
+
+def hash_cases(max_workers):
+    """Yield (name, hash_type, cost, engine, workers) for every hashing case"""
+    algos = [(a, None) for a in FAST_HASHES] + [("bcrypt", c) for c in BCRYPT_COSTS if get_engine("bcrypt").available()]
+    algos += [(name, KDF_COSTS.get(name)) for name, cls in ENGINES.items() if cls.salted and name != "bcrypt" and cls.available()]
+    for algo, cost in algos:
+        label = f"{algo}-{cost}" if cost else algo
+        for engine in ("thread", "process"):
+            for n in worker_counts(max_workers):
+                yield f"{label}/{engine}/{n}", algo, cost, engine, n
+
+
+def run_suite(max_workers, duration=1.0, wordlist=None, report=None, script=None):
+    """Run every case and return the results document
+
+    report(result) is called after each case. wordlist is used for the I/O
+    cases if given; otherwise a synthetic one is generated. script is the
+    cracker to time start-up of; without it only worker start-up is timed.
+    """
+    results = []
+
+    def add(result, measure):
+        """Fill result from measure(); a case that raises is recorded as failed, not fatal"""
+        try:
+            result.update(measure())
+        except Exception as e:
+            result.update(rate=0.0, error=f"{type(e).__name__}: {e}")
+        results.append(result)
+        if report:
+            report(result)
+
+    def hash_case(algo, cost, bench, n, chunk):
+        rate = bench(source, [(algo, synthetic_target(algo, cost))], n, chunk, duration)
+        if not rate:
+            raise RuntimeError(f"no chunk finished within {MAX_WINDOW:g}s")
+        return {"rate": rate}
+
+    def io_case(path, compiled=None):
+        if compiled:
+            compile_wordlist(path, compiled, dedup=False)
+            path = compiled
+        rate, mb = bench_io(path, duration)
+        return {"rate": rate, "mb_s": mb}
+
+    def startup_case(args):
+        rate, ms, overhead = bench_startup(args)
+        return {"rate": rate, "ms": ms, "overhead_ms": overhead}
+
+    source = Mask(BENCH_MASK)
+    for name, algo, cost, engine, n in hash_cases(max_workers):
+        chunk = max(64 // source.unit, chunk_size_for(algo) // source.unit)
+        bench = bench_threads if engine == "thread" else bench_processes
+        add({"name": name, "kind": "hash", "algo": algo, "cost": cost, "engine": engine, "workers": n},
+            lambda: hash_case(algo, cost, bench, n, chunk))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if not wordlist or not os.path.exists(wordlist):
+            wordlist = os.path.join(tmp, "bench.txt")
+            with open(wordlist, "wb") as f:
+                f.write(b"".join(b"bench%08d\n" % i for i in range(IO_LINES)))
+        compiled = os.path.join(tmp, "bench.csw")
+        add({"name": "io/text", "kind": "io"}, lambda: io_case(wordlist))
+        add({"name": "io/compiled", "kind": "io"}, lambda: io_case(wordlist, compiled))
+
+    startup = [("startup/worker", ["-c", WORKER_IMPORTS])]
+    if script:
+        startup.insert(0, ("startup/version", [script, "--version"]))
+    for name, args in startup:
+        add({"name": name, "kind": "startup"}, lambda: startup_case(args))
+
+    return {"version": VERSION, "ts": time.time(), "host": platform.node(), "platform": platform.platform(),
+            "python": sys.version.split()[0], "cpus": os.cpu_count(), "duration": duration, "results": results}
+
+
+def save(doc, path):
+    """Write a results document as JSON"""
+    with open(path, "w") as f:
+        json.dump(doc, f, indent=2)
+
+
+def compare(doc, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return (name, baseline rate, rate, change, regressed) for every case in both documents
+
+    Failed cases are never a baseline; a case that fails now counts as a regression.
+    """
+    before = {r["name"]: r["rate"] for r in baseline.get("results", []) if not r.get("error")}
+    rows = []
+    for r in doc["results"]:
+        base = before.get(r["name"])
+        if not base:
+            continue
+        rate = 0.0 if r.get("error") else r["rate"]
+        change = rate / base - 1
+        rows.append((r["name"], base, rate, change, change < -threshold))
+    return rows
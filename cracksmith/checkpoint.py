@@ -0,0 +1,147 @@
+"""
+Periodic, atomic checkpoints for resuming a cracking run from a byte offset
+"""
+import os
+import json
+import time
+import bisect
+import hashlib
+import threading
+
+VERSION = 2
+
+
+def wordlist_identity(source):
+    """Describe a wordlist so a stale checkpoint is never applied
+
+    Compiled wordlists carry a content hash; others are identified by path,
+    size and mtime.
+    """
+    key = f"{os.path.abspath(source.path)}|{source.size}|{source.mtime}"
+    return {"path": source.path, "size": source.size, "mtime": source.mtime,
+            "id": getattr(source, "digest", None) or hashlib.sha1(key.encode()).hexdigest()}
+
+
+def targets_identity(targets):
+    """Return a stable id for the set of target hashes a job cracks"""
+    return hashlib.sha256(b"\n".join(sorted(t for _, t in targets))).hexdigest()
+
+
+class RangeLog:
+    """Completed byte ranges of a wordlist, merged as chunks finish in any order
+
+    offset is the low-water mark: every line starting before it has been
+    tried. ranges holds completed ranges past the mark.
+    """
+
+    def __init__(self, offset=0, ranges=()):
+        self.offset = offset
+        self.ranges = sorted([a, b] for a, b in ranges if b > offset)
+        self._lock = threading.Lock()
+        self._advance()
+
+    def _advance(self):
+        while self.ranges and self.ranges[0][0] <= self.offset:
+            self.offset = max(self.offset, self.ranges.pop(0)[1])
+
+    def complete(self, start, end):
+        """Mark the byte range [start, end) as done"""
+        with self._lock:
+            i = bisect.bisect_left(self.ranges, [start, end])
+            self.ranges.insert(i, [start, end])
+            # Merge with the neighbours the new range touches
+            if i + 1 < len(self.ranges) and self.ranges[i + 1][0] <= end:
+                self.ranges[i][1] = max(end, self.ranges.pop(i + 1)[1])
+            if i > 0 and self.ranges[i - 1][1] >= start:
+                self.ranges[i - 1][1] = max(self.ranges[i - 1][1], self.ranges.pop(i)[1])
+            self._advance()
+
+    def snapshot(self):
+        """Return (offset, ranges) as plain lists safe to serialise"""
+        with self._lock:
+            return self.offset, [list(r) for r in self.ranges]
+
+
+class Checkpoint:
+    """Reads and periodically rewrites the resume entry of one cracking job
+
+    The resume file holds one entry per job, keyed by the target set, so a
+    hashfile run with several jobs resumes each of them. Hashes cracked
+    before an interruption reach the potfile and drop out of the next run's
+    targets, so an entry also matches when its cracked hashes make up the
+    difference; those are carried into every later save to keep the key.
+    """
+
+    def __init__(self, path, source, targets, interval=10.0, rules=None):
+        self.path = path
+        self.source = source
+        self.interval = interval
+        self.wordlist = wordlist_identity(source)
+        self.targets = [t for _, t in targets]
+        self.target = targets_identity(targets)
+        self.rules = rules.digest if rules else None
+        self.carried = {}
+        self._last = time.monotonic()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self):
+        """Return (offset, done_ranges, attempts, cracked) to resume from, or a fresh start"""
+        data = self._read()
+        if "last_index" in data:
+            # Resume file from before byte-offset checkpoints
+            return self.source.offset_of(data["last_index"]), [], data["last_index"], {}
+        job = self._match(data.get("jobs", {}))
+        if not job:
+            return 0, [], 0, {}
+        cracked = job.get("cracked", {})
+        pending = set(self.targets)
+        self.carried = {t.encode(): p for t, p in cracked.items() if t.encode() not in pending}
+        return job["offset"], job.get("done", []), job.get("attempts", 0), {t: p for t, p in cracked.items() if t.encode() in pending}
+
+    def _match(self, jobs):
+        """Return the entry for this job, adopting its key if it had more targets then"""
+        def usable(job):
+            return job.get("wordlist", {}).get("id") == self.wordlist["id"] and job.get("rules") == self.rules
+
+        job = jobs.get(self.target)
+        if job and usable(job):
+            return job
+        for key, job in jobs.items():
+            if not usable(job) or not job.get("cracked"):
+                continue
+            before = set(self.targets) | {t.encode() for t in job["cracked"]}
+            if targets_identity((None, t) for t in before) == key:
+                self.target = key
+                return job
+        return None
+
+    def save(self, log, attempts, cracked=None):
+        """Atomically write the job's current progress to the resume file"""
+        offset, done = log.snapshot()
+        cracked = {**self.carried, **(cracked or {})}
+        data = self._read()
+        if data.get("version") != VERSION:
+            data = {"version": VERSION, "jobs": {}}
+        data["jobs"][self.target] = {
+            "wordlist": self.wordlist, "rules": self.rules, "offset": offset, "done": done,
+            "attempts": attempts, "saved": time.time(),
+            "cracked": {t.decode(): p for t, p in cracked.items()},
+        }
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._last = time.monotonic()
+
+    def maybe_save(self, log, attempts, cracked=None):
+        """Save if the checkpoint interval has elapsed since the last write"""
+        if time.monotonic() - self._last >= self.interval:
+            self.save(log, attempts, cracked)
@@ -0,0 +1,149 @@
+"""
+Compiled binary wordlists: deduplicated candidates with an O(1) offset index
+
+Layout (little endian):
+    header   magic, version, count, data offset, index offset, sha256
+    data     every candidate followed by a newline
+    index    count + 1 uint64 offsets into the file, one per candidate start
+
+CompiledWordlist implements the Wordlist interface with candidate indices as
+offsets, so dispatch, both engines and checkpoints work unchanged.
+"""
+import os
+import mmap
+import struct
+import hashlib
+from array import array
+from itertools import accumulate
+
+MAGIC = b"CSWL"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQQ32s")
+COMPILE_BLOCK = 1 << 20
+INDEX_FLUSH = 1 << 20
+
+
+def is_compiled(path):
+    """Return True if path holds a compiled wordlist"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def compile_wordlist(src, dst, dedup=True):
+    """Compile a text wordlist into dst and return (lines read, candidates kept)
+
+    Candidates are stripped and, with dedup, only their first occurrence is
+    kept, so file order (and any ranking in it) is preserved. Deduplication
+    keeps every unique candidate in memory (its bytes, so distinct words
+    never merge and the output is the same on every run); everything else
+    is streamed.
+    """
+    from cracksmith.dispatch import ChunkDispatcher
+    from cracksmith.wordlist import open_wordlist
+
+    tmp, idx_tmp = dst + ".tmp", dst + ".idx.tmp"
+    seen, digest = set(), hashlib.sha256()
+    lines = kept = 0
+    pos = HEADER.size
+    with open_wordlist(src) as source, open(tmp, 'wb') as out, open(idx_tmp, 'wb') as idx:
+        out.write(b"\0" * HEADER.size)
+        offsets = array('Q', [pos])
+        for chunk in ChunkDispatcher(source, chunk_size=COMPILE_BLOCK):
+            words = chunk.candidates
+            lines += len(words)
+            if dedup:
+                fresh = []
+                for w in words:
+                    if w not in seen:
+                        seen.add(w)
+                        fresh.append(w)
+                words = fresh
+            if not words:
+                continue
+            blob = b"\n".join(words) + b"\n"
+            out.write(blob)
+            digest.update(blob)
+            ends = accumulate((len(w) + 1 for w in words), initial=pos)
+            next(ends)  # The chunk's start is already the previous chunk's end
+            offsets.extend(ends)
+            pos += len(blob)
+            kept += len(words)
+            if len(offsets) >= INDEX_FLUSH:
+                offsets.tofile(idx)
+                offsets = array('Q')
+        offsets.tofile(idx)
+    # Append the index behind the data and fill in the header
+    with open(tmp, 'r+b') as out, open(idx_tmp, 'rb') as idx:
+        out.seek(pos)
+        while True:
+            block = idx.read(COMPILE_BLOCK)
+            if not block:
+                break
+            out.write(block)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, kept, HEADER.size, pos, digest.digest()))
+    os.remove(idx_tmp)
+    os.replace(tmp, dst)
+    return lines, kept
+
+
+class CompiledWordlist:
+    """Memory-mapped compiled wordlist addressed by candidate index"""
+    unit = 8  # Offsets are candidates; chunk sizes are tuned in wordlist bytes (~8 per line)
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        st = os.fstat(self._file.fileno())
+        self.mtime = st.st_mtime
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, self._data, index, digest = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} compiled wordlist")
+        self.size = self.total = count
+        self.digest = digest.hex()
+        self._offsets = memoryview(self._mm)[index:index + 8 * (count + 1)].cast('Q')
+
+    def __reduce__(self):
+        return (CompiledWordlist, (self.path,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._offsets.release()
+        self._mm.close()
+        self._file.close()
+
+    def candidate(self, index):
+        """Return the candidate at an index"""
+        return self._mm[self._offsets[index]:self._offsets[index + 1] - 1]
+
+    def align(self, pos):
+        return min(max(pos, 0), self.size)
+
+    def span(self, start, end):
+        start, end = self.align(start), self.align(end)
+        return start, self._mm[self._offsets[start]:self._offsets[end]]
+
+    @staticmethod
+    def split(data):
+        return data.split(b"\n")[:-1]
+
+    def line_offset(self, offset, n):
+        return offset + n
+
+    def index_at(self, offset):
+        return offset
+
+    def offset_of(self, index):
+        return min(index, self.size)
+
+    def count_async(self, callback):
+        callback(self.size)
@@ -0,0 +1,293 @@
+"""
+Streaming access to compressed wordlists (gzip, bz2, xz, zstd)
+
+A compressed file cannot be sliced, so every pass over it runs a Feed: a
+producer thread that decompresses the stream into line-aligned blocks and
+hands them to workers through a bounded queue, overlapping decompression
+with hashing. Offsets are positions in the decompressed stream. Until a
+full pass has counted the lines, their total is estimated from the
+compressed bytes consumed.
+
+For worker processes the blocks travel through a BlockRing of shared
+memory slots; the queue only carries (start, end, slot, size) tuples, so
+block data is written once and never pickled.
+"""
+import os
+import queue
+import threading
+import time
+
+from cracksmith.wordlist import Wordlist, read_count, write_count
+
+MAGIC = {b"\x1f\x8b": "gzip", b"BZh": "bz2", b"\xfd7zXZ\x00": "xz", b"\x28\xb5\x2f\xfd": "zstd"}
+EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".lzma": "xz", ".zst": "zstd"}
+READ_BLOCK = 1 << 20
+QUEUE_BLOCKS = 64
+SLOT_SLACK = 1 << 16  # Room past block_size for the line a block is extended to
+ESTIMATE_EVERY = 0.5
+
+
+def detect_compression(path):
+    """Return the compression format of a file by magic bytes, then extension, or None"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(6)
+    except OSError:
+        return None
+    for magic, fmt in MAGIC.items():
+        if head.startswith(magic):
+            return fmt
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower()) if head else None
+
+
+def open_stream(raw, fmt):
+    """Wrap a binary file object in a decompressing reader"""
+    if fmt == "gzip":
+        import gzip
+        return gzip.GzipFile(fileobj=raw)
+    if fmt == "bz2":
+        import bz2
+        return bz2.BZ2File(raw)
+    if fmt == "xz":
+        import lzma
+        return lzma.LZMAFile(raw)
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd wordlists need the zstandard package (pip install zstandard)") from None
+    return zstandard.ZstdDecompressor().stream_reader(raw)
+
+
+class BlockRing:
+    """Fixed-size slots of shared memory lent out by a free list, for blocks bound for processes
+
+    Workers attach to the segment by name when the ring is unpickled. A
+    worker reads its block through a memoryview of the slot, copies it out
+    once to split it into candidates and hands the slot straight back.
+    """
+
+    def __init__(self, ctx, slots, slot_size):
+        from multiprocessing import shared_memory
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_size)
+        self.slot_size = slot_size
+        # A SimpleQueue is written directly, without a feeder thread competing with hashing
+        # for the GIL; the semaphore counts its slots so the producer can wait with a timeout
+        self.free, self.available = ctx.SimpleQueue(), ctx.Semaphore(0)
+        for slot in range(slots):
+            self.give(slot)
+
+    def take(self, timeout=None):
+        """Return a free slot, or None if none came free within timeout"""
+        return self.free.get() if self.available.acquire(timeout=timeout) else None
+
+    def give(self, slot):
+        """Return a slot to the free list"""
+        self.free.put(slot)
+        self.available.release()
+
+    def view(self, slot, size):
+        """Return a zero-copy memoryview of a slot's first size bytes"""
+        base = slot * self.slot_size
+        return self.shm.buf[base:base + size]
+
+    def release(self):
+        """Unmap the segment here and, in its creator, remove it"""
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class FeedReader:
+    """Consumer end of a Feed; picklable into worker processes when its queue is"""
+
+    def __init__(self, blocks, ring=None):
+        self.blocks = blocks
+        self.ring = ring
+
+    def next_block(self):
+        """Return the next (start, end, data) block, or None once the pass is over"""
+        block = self.blocks.get()
+        if block is None:
+            self.blocks.put(None)  # Leave the end marker for the other consumers
+            return None
+        if len(block) == 3:
+            return block  # Thread consumers, or a block too large for a slot
+        start, end, slot, size = block
+        view = self.ring.view(slot, size)
+        data = bytes(view)
+        view.release()
+        self.ring.give(slot)
+        return start, end, data
+
+
+class Feed:
+    """One decompression pass producing line-aligned blocks of about block_size bytes
+
+    Blocks ending at or before start, or inside a done range, are skipped.
+    Pass a multiprocessing context to share the blocks with worker processes
+    through a BlockRing.
+    """
+
+    def __init__(self, source, start=0, block_size=1 << 16, done=(), ctx=None):
+        self.source, self.start, self.block_size = source, start, max(1, block_size)
+        self.done = sorted(tuple(r) for r in done)
+        self.blocks = ctx.Queue(QUEUE_BLOCKS) if ctx else queue.Queue(QUEUE_BLOCKS)
+        self.ring = BlockRing(ctx, QUEUE_BLOCKS, self.block_size + SLOT_SLACK) if ctx else None
+        if ctx:
+            self.blocks.cancel_join_thread()  # Unconsumed blocks must not hold up exit
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def reader(self):
+        return FeedReader(self.blocks, self.ring)
+
+    def close(self):
+        """Stop decompressing, release every waiting consumer and free the shared slots"""
+        self._stop.set()
+        while True:
+            try:
+                self.blocks.get_nowait()
+            except queue.Empty:
+                break
+        self._put(None)
+        if self.ring:
+            self._thread.join()  # The producer may still be writing into a slot
+            self.ring.release()
+
+    def _put(self, item):
+        while True:
+            try:
+                self.blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if self._stop.is_set() and item is not None:
+                    return False
+
+    def _send(self, start, end, data):
+        """Queue one block, through a shared slot when there is a ring"""
+        if self.ring is None or len(data) > self.ring.slot_size:
+            return self._put((start, end, bytes(data)))
+        slot = None
+        while slot is None:
+            slot = self.ring.take(timeout=0.1)
+            if slot is None and self._stop.is_set():
+                return False
+        view = self.ring.view(slot, len(data))
+        view[:] = data
+        view.release()
+        return self._put((start, end, slot, len(data)))
+
+    def _skip(self, start, end):
+        if end <= self.start:
+            return True
+        return any(a <= start and end <= b for a, b in self.done)
+
+    def _produce(self):
+        source, pos, lines, carry, last = self.source, 0, 0, b"", 0.0
+        try:
+            with open(source.path, 'rb') as raw, open_stream(raw, source.format) as stream:
+                while not self._stop.is_set():
+                    data = stream.read(READ_BLOCK)
+                    if not data:
+                        data, carry = carry, b""
+                        if not data:
+                            break
+                    else:
+                        data = carry + data
+                        cut = data.rfind(b"\n") + 1
+                        data, carry = data[:cut], data[cut:]
+                    i, view = 0, memoryview(data)
+                    while i < len(data):
+                        j = data.find(b"\n", min(i + self.block_size, len(data)) - 1) + 1 or len(data)
+                        if not self._skip(pos + i, pos + j) and not self._send(pos + i, pos + j, view[i:j]):
+                            return
+                        i = j
+                    view.release()
+                    pos += len(data)
+                    lines += data.count(b"\n") + (not data.endswith(b"\n") and bool(data))
+                    if time.monotonic() - last >= ESTIMATE_EVERY:
+                        last = time.monotonic()
+                        source.estimate(lines, raw.tell())
+                else:
+                    return  # Closed early, so the count is incomplete
+            source.counted(lines)
+        except (OSError, EOFError, ValueError) as e:
+            self.error = e  # Truncated or corrupt stream: crack what was readable
+        finally:
+            if not self._stop.is_set():
+                self._put(None)
+
+
+class CompressedWordlist:
+    """Sequential wordlist read through a decompressing Feed per pass"""
+    unit = 1  # Offsets are bytes of the decompressed stream
+    streaming = True
+    split = staticmethod(Wordlist.split)
+
+    def __init__(self, path):
+        self.path = path
+        self.format = detect_compression(path)
+        st = os.stat(path)
+        self.size, self.mtime = st.st_size, st.st_mtime  # Compressed size, for identity and estimates
+        self.total = read_count(path, self.size, self.mtime)
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        return (CompressedWordlist, (self.path,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass  # Every Feed opens and closes the file itself
+
+    def feed(self, start=0, block_size=1 << 16, done=(), ctx=None):
+        """Start a decompression pass and return its Feed"""
+        return Feed(self, start, block_size, done, ctx)
+
+    def line_offset(self, offset, n):
+        # Blocks are gone once consumed, so hits are located at their block start
+        return offset
+
+    def estimate(self, lines, consumed):
+        """Report a line total extrapolated from compressed bytes consumed so far"""
+        if self.total is None and consumed:
+            guess = int(lines * self.size / consumed)
+            for cb in list(self._callbacks):
+                cb(max(lines, guess))
+
+    def counted(self, lines):
+        """Record the exact line count after a full pass"""
+        with self._lock:
+            self.total = lines
+            callbacks, self._callbacks = self._callbacks, []
+        write_count(self.path, self.size, self.mtime, lines)
+        for cb in callbacks:
+            cb(lines)
+
+    def count_lines(self):
+        """Return the exact line count, decompressing the whole file once if it is not cached"""
+        if self.total is None:
+            feed = self.feed(block_size=READ_BLOCK)
+            reader = feed.reader()
+            while reader.next_block() is not None:
+                pass
+            if feed.error:
+                raise feed.error
+        return self.total
+
+    def count_async(self, callback):
+        """Hand callback estimates while a pass runs and the exact total once known"""
+        with self._lock:
+            if self.total is None:
+                self._callbacks.append(callback)
+                return
+        callback(self.total)
@@ -0,0 +1,122 @@
+"""
+Pure-Python hash primitives missing from hashlib on some builds
+
+MD4 (for NTLM) is gone from OpenSSL 3's default provider and the crypt
+module is deprecated, so both are implemented here.
+"""
+import base64
+import hashlib
+import struct
+
+MASK = 0xFFFFFFFF
+CRYPT64 = b"./0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+# (message word, shift) for each of the 48 MD4 steps, and the round constants
+MD4_STEPS = [(i, (3, 7, 11, 19)[i % 4]) for i in range(16)] + \
+            [(i, (3, 5, 9, 13)[n % 4]) for n, i in enumerate((0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15))] + \
+            [(i, (3, 9, 11, 15)[n % 4]) for n, i in enumerate((0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15))]
+MD4_ROUND = (0, 0x5A827999, 0x6ED9EBA1)
+
+# Byte triplets of the final sha512crypt digest, in encoding order
+SHA512_CRYPT_ORDER = [(0, 21, 42), (22, 43, 1), (44, 2, 23), (3, 24, 45), (25, 46, 4), (47, 5, 26), (6, 27, 48),
+                      (28, 49, 7), (50, 8, 29), (9, 30, 51), (31, 52, 10), (53, 11, 32), (12, 33, 54), (34, 55, 13),
+                      (56, 14, 35), (15, 36, 57), (37, 58, 16), (59, 17, 38), (18, 39, 60), (40, 61, 19), (62, 20, 41)]
+SHA512_CRYPT_ROUNDS = 5000
+SHA512_CRYPT_MIN_ROUNDS, SHA512_CRYPT_MAX_ROUNDS = 1000, 999999999
+
+
+def _md4_pure(data):
+    msg = data + b"\x80" + b"\0" * ((55 - len(data)) % 64) + struct.pack("<Q", len(data) * 8)
+    h = [0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476]
+    for off in range(0, len(msg), 64):
+        x = struct.unpack_from("<16I", msg, off)
+        a, b, c, d = h
+        for n, (k, s) in enumerate(MD4_STEPS):
+            r = n >> 4
+            if r == 0:
+                f = (b & c) | (~b & d)
+            elif r == 1:
+                f = (b & c) | (b & d) | (c & d)
+            else:
+                f = b ^ c ^ d
+            t = (a + f + x[k] + MD4_ROUND[r]) & MASK
+            a, b, c, d = d, ((t << s) | (t >> (32 - s))) & MASK, b, c
+        h = [(v + w) & MASK for v, w in zip(h, (a, b, c, d))]
+    return struct.pack("<4I", *h)
+
+
+def _md4_openssl(data):
+    return hashlib.new("md4", data).digest()
+
+
+try:
+    _md4_openssl(b"")
+    md4 = _md4_openssl
+except ValueError:
+    md4 = _md4_pure  # OpenSSL 3 without the legacy provider
+
+
+def utf16(password):
+    """Return a candidate as UTF-16LE, reading bytes that are not UTF-8 as Latin-1"""
+    try:
+        return password.decode('utf-8').encode('utf-16-le')
+    except UnicodeDecodeError:
+        return password.decode('latin-1').encode('utf-16-le')
+
+
+def ntlm(password):
+    """Return the NT hash (MD4 of UTF-16LE) of a candidate"""
+    return md4(utf16(password))
+
+
+def ab64_decode(data):
+    """Decode passlib's adapted base64 ("." for "+", no padding)"""
+    data = data.replace(b".", b"+")
+    return base64.b64decode(data + b"=" * (-len(data) % 4))
+
+
+def ab64_encode(data):
+    return base64.b64encode(data).rstrip(b"=").replace(b"+", b".")
+
+
+def b64_decode(data):
+    """Decode unpadded standard base64 as used by PHC strings (argon2)"""
+    return base64.b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _repeat(digest, length):
+    return digest * (length // len(digest)) + digest[:length % len(digest)]
+
+
+def sha512_crypt(password, salt, rounds=SHA512_CRYPT_ROUNDS):
+    """Return the 86-character sha512crypt digest of a candidate (Drepper's SHA-crypt, $6$)"""
+    sha512 = hashlib.sha512
+    salt = salt[:16]
+    alt = sha512(password + salt + password).digest()
+    a = sha512(password + salt + _repeat(alt, len(password)))
+    i = len(password)
+    while i:
+        a.update(alt if i & 1 else password)
+        i >>= 1
+    c = a.digest()
+    p = _repeat(sha512(password * len(password)).digest(), len(password))
+    s = _repeat(sha512(salt * (16 + c[0])).digest(), len(salt))
+    for i in range(rounds):
+        h = sha512(p if i & 1 else c)
+        if i % 3:
+            h.update(s)
+        if i % 7:
+            h.update(p)
+        h.update(c if i & 1 else p)
+        c = h.digest()
+    out = bytearray()
+    for b2, b1, b0 in SHA512_CRYPT_ORDER:
+        w = (c[b2] << 16) | (c[b1] << 8) | c[b0]
+        for _ in range(4):
+            out.append(CRYPT64[w & 0x3F])
+            w >>= 6
+    w = c[63]
+    for _ in range(2):
+        out.append(CRYPT64[w & 0x3F])
+        w >>= 6
+    return bytes(out)
@@ -0,0 +1,260 @@
+"""
+Precomputed on-disk digest indexes for instant lookup of unsalted hashes
+
+One index per wordlist and algorithm maps a truncated digest to the offset
+of the candidate that produced it. Layout (little endian header):
+    header   magic, version, algorithm, record count, wordlist identity
+    records  sorted 16-byte records: digest[:8] followed by a uint64 offset
+
+A lookup binary-searches the memory-mapped records and rehashes the few
+candidates sharing the truncated digest, so a false match is impossible.
+"""
+import os
+import mmap
+import heapq
+import shutil
+import struct
+import bisect
+import tempfile
+import multiprocessing as mp
+
+from cracksmith.checkpoint import wordlist_identity
+from cracksmith.engines import FAST_HASHES, get_engine
+
+INDEX_ALGOS = ("md5", "sha1", "sha256")  # Built by default; any unsalted engine can be indexed
+MAGIC = b"CSDX"
+VERSION = 1
+HEADER = struct.Struct("<4sI16sQ64s")
+KEY_BYTES = 8
+RECORD = KEY_BYTES + 8
+SUFFIX = ".idx"
+RANGE_BYTES = 1 << 26  # Wordlist bytes hashed per build task
+RUN_RECORDS = 1 << 18  # Records sorted in memory before a run is spilled to disk
+MERGE_FANIN = 256  # Runs merged at once, well below open file limits
+READ_BLOCK = RECORD << 12
+
+
+def index_path(wordlist, algo):
+    """Return where the index of a wordlist for an algorithm is stored"""
+    return f"{wordlist}.{algo}{SUFFIX}"
+
+
+def _spill(records, tmpdir):
+    records.sort()
+    fd, path = tempfile.mkstemp(dir=tmpdir)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(b"".join(records))
+    records.clear()
+    return path
+
+
+def _index_range(path, start, end, algos, tmpdir):
+    """Pool task: hash the lines of a wordlist in [start, end) and spill sorted runs per algorithm"""
+    from cracksmith.wordlist import open_wordlist
+
+    source = open_wordlist(path)
+    runs = {algo: [] for algo in algos}
+    records = {algo: [] for algo in algos}
+    funcs = [(get_engine(algo).digest, records[algo]) for algo in algos]
+    step_bytes = source.unit == 1  # Text wordlists are addressed by byte, compiled ones by candidate
+    block = max(1, (1 << 20) // source.unit)
+    with source:
+        for a in range(start, end, block):
+            pos, data = source.span(a, min(a + block, end))
+            lines = data.split(b"\n")
+            if lines and not lines[-1]:
+                lines.pop()
+            for line in lines:
+                tail = pos.to_bytes(8, 'little')
+                word = line.strip()
+                for algo, out in funcs:
+                    out.append(algo(word)[:KEY_BYTES] + tail)
+                pos += len(line) + 1 if step_bytes else 1
+            for algo in algos:
+                if len(records[algo]) >= RUN_RECORDS:
+                    runs[algo].append(_spill(records[algo], tmpdir))
+    for algo in algos:
+        if records[algo]:
+            runs[algo].append(_spill(records[algo], tmpdir))
+    return runs
+
+
+def _read_run(path):
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(READ_BLOCK)
+            if not block:
+                return
+            for i in range(0, len(block), RECORD):
+                yield block[i:i + RECORD]
+
+
+def _merge_runs(runs, out):
+    """Merge sorted run files into an open file, returning the record count"""
+    count = 0
+    buf = []
+    for record in heapq.merge(*(_read_run(path) for path in runs)):
+        buf.append(record)
+        if len(buf) >= 1 << 16:
+            out.write(b"".join(buf))
+            count += len(buf)
+            buf.clear()
+    out.write(b"".join(buf))
+    for path in runs:
+        os.remove(path)
+    return count + len(buf)
+
+
+def _write_index(algo, runs, dst, identity, tmpdir):
+    """Pool task: merge every run of an algorithm into its final index file"""
+    # Merge in levels so no more than MERGE_FANIN runs are ever open at once
+    while len(runs) > MERGE_FANIN:
+        merged = []
+        for i in range(0, len(runs), MERGE_FANIN):
+            fd, path = tempfile.mkstemp(dir=tmpdir)
+            with os.fdopen(fd, 'wb') as out:
+                _merge_runs(runs[i:i + MERGE_FANIN], out)
+            merged.append(path)
+        runs = merged
+    with open(dst + ".tmp", 'wb') as out:
+        out.write(b"\0" * HEADER.size)
+        count = _merge_runs(runs, out)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, algo.encode(), count, identity.encode()))
+    os.replace(dst + ".tmp", dst)
+    return count
+
+
+def build_indexes(path, algos=INDEX_ALGOS, workers=None):
+    """Index a wordlist for every algorithm in one streamed pass and return the candidate count
+
+    Worker processes hash disjoint slices of the wordlist and spill sorted
+    runs to a temporary directory next to it; the runs are then merged per
+    algorithm in parallel, so memory use stays bounded by the run size.
+    """
+    from cracksmith.wordlist import open_wordlist
+
+    for algo in algos:
+        engine = get_engine(algo)
+        if engine is None or engine.salted or not hasattr(engine, "digest"):
+            raise ValueError(f"{algo} cannot be indexed, only unsalted digests can")
+    source = open_wordlist(path)
+    if getattr(source, "streaming", False):
+        source.close()
+        raise ValueError("digest indexes need random access, compile the compressed wordlist first")
+    try:
+        identity = wordlist_identity(source)["id"]
+        step = max(1, RANGE_BYTES // source.unit)
+        ranges = [(i, min(i + step, source.size)) for i in range(0, source.size, step)]
+    finally:
+        source.close()
+    tmpdir = tempfile.mkdtemp(prefix=".cracksmith-index-", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with mp.get_context().Pool(workers or os.cpu_count()) as pool:
+            runs = {algo: [] for algo in algos}
+            tasks = [(path, a, b, algos, tmpdir) for a, b in ranges]
+            for result in pool.starmap(_index_range, tasks):
+                for algo, paths in result.items():
+                    runs[algo].extend(paths)
+            counts = pool.starmap(_write_index, [
+                (algo, runs[algo], index_path(path, algo), identity, tmpdir) for algo in algos])
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return counts[0] if counts else 0
+
+
+class _Keys:
+    """Sequence view of the truncated digests in an index, for bisect"""
+
+    def __init__(self, mm, count):
+        self._mm, self._count = mm, count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        pos = HEADER.size + i * RECORD
+        return self._mm[pos:pos + KEY_BYTES]
+
+
+class DigestIndex:
+    """Memory-mapped digest index of one wordlist for one algorithm"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, algo, self.count, identity = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} digest index")
+        self.algo = algo.rstrip(b"\0").decode()
+        self.identity = identity.rstrip(b"\0").decode()
+        self._keys = _Keys(self._mm, self.count)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def offsets(self, digest):
+        """Return the offsets of every candidate whose digest starts like digest"""
+        key = digest[:KEY_BYTES]
+        i, found = bisect.bisect_left(self._keys, key), []
+        while i < self.count and self._keys[i] == key:
+            pos = HEADER.size + i * RECORD + KEY_BYTES
+            found.append(int.from_bytes(self._mm[pos:pos + 8], 'little'))
+            i += 1
+        return found
+
+    def lookup(self, source, digest):
+        """Return the candidate of source hashing to digest, or None"""
+        algo = get_engine(self.algo).digest
+        for offset in self.offsets(digest):
+            words = source.split(source.span(offset, offset + 1)[1])
+            if words and algo(words[0]) == digest:
+                return words[0]
+        return None
+
+
+def open_index(source, algo):
+    """Return the DigestIndex of a wordlist for an algorithm, or None if missing or stale"""
+    try:
+        index = DigestIndex(index_path(source.path, algo))
+    except (OSError, ValueError):
+        return None
+    if index.identity != wordlist_identity(source)["id"] or index.algo != algo:
+        index.close()
+        return None
+    return index
+
+
+def lookup_many(source, targets):
+    """Resolve (hash_type, hash) targets through the wordlist's digest indexes
+
+    Returns (found, indexed): found maps each resolved target to its
+    password bytes, indexed holds the hash types an up-to-date index
+    covers, whose unresolved targets are therefore not in the wordlist.
+    """
+    found, indexed = {}, set()
+    for algo in sorted({t for t, _ in targets if t in FAST_HASHES}):
+        index = open_index(source, algo)
+        if index is None:
+            continue
+        indexed.add(algo)
+        with index:
+            parse = get_engine(algo).parse
+            for hash_type, target in targets:
+                if hash_type != algo:
+                    continue
+                try:
+                    pwd = index.lookup(source, parse(target))
+                except ValueError:
+                    continue
+                if pwd is not None:
+                    found[target] = pwd
+    return found, indexed
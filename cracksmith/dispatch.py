@@ -0,0 +1,117 @@
+"""
+Chunked work distribution for CrackSmith workers
+"""
+import threading
+from collections import namedtuple
+
+from cracksmith.engines import get_engine
+
+DEFAULT_CHUNK = 1 << 16
+# Slow (salted) hashes get small chunks so stop/found checks and progress stay responsive
+SLOW_CHUNK = 512
+
+# fanout is the number of candidates generated per wordlist line (1 without rules)
+Chunk = namedtuple("Chunk", "start end offset candidates fanout")
+
+
+def chunk_size_for(hash_type, override=None):
+    """Return the chunk size in bytes for a hash type"""
+    if override:
+        return override
+    engine = get_engine(hash_type)
+    return SLOW_CHUNK if engine and engine.salted else DEFAULT_CHUNK
+
+
+class _Cursor:
+    """In-process stand-in for a multiprocessing.Value holding the next offset"""
+
+    def __init__(self, value):
+        self.value = value
+        self._lock = threading.Lock()
+
+    def get_lock(self):
+        return self._lock
+
+
+class ChunkDispatcher:
+    """Hands out contiguous, line-aligned byte ranges of a wordlist to workers
+
+    Pass a multiprocessing.Value as cursor to share one dispatch position
+    between processes; the start offset is then taken from the cursor.
+    Ranges listed in done (e.g. from a checkpoint) are skipped. With a
+    RuleSet every line is expanded into len(rules) candidates.
+
+    Streaming sources (compressed wordlists) cannot be sliced; their blocks
+    come from a Feed instead, and cursor is then a FeedReader to share.
+    """
+
+    def __init__(self, source, start=0, end=None, chunk_size=DEFAULT_CHUNK, cursor=None, done=(), rules=None):
+        self.source = source
+        self.feed = None
+        if cursor is None and getattr(source, "streaming", False):
+            self.feed = source.feed(start, chunk_size, done)
+            cursor = self.feed.reader()
+        self.cursor = cursor if cursor is not None else _Cursor(start)
+        self.end = source.size if end is None else min(end, source.size)
+        self.chunk_size = chunk_size
+        self.done = sorted(tuple(r) for r in done)
+        self.rules = rules
+
+    def next_chunk(self):
+        """Return the next Chunk, or None once the range is exhausted
+
+        Chunks tile the raw byte range exactly, so (start, end) can be logged
+        as completed; offset is where the chunk's first whole line begins.
+        """
+        claimed = self.claim()
+        return None if claimed is None else self.chunk(*self.read(*claimed))
+
+    def claim(self):
+        """Reserve the next range and return (start, end, block), or None once exhausted
+
+        block is the range's data for streaming sources and None otherwise.
+        claim, read and chunk are the steps of next_chunk, kept apart so a
+        profiler can time waiting, reading and splitting separately.
+        """
+        if hasattr(self.cursor, "next_block"):
+            return self.cursor.next_block()
+        with self.cursor.get_lock():
+            start = self.cursor.value
+            for a, b in self.done:
+                if a <= start < b:
+                    start = b
+            end = min(start + self.chunk_size, self.end)
+            for a, b in self.done:
+                if start < a < end:
+                    end = a
+                    break
+            self.cursor.value = max(start, end)
+            if start >= self.end:
+                return None
+        return start, end, None
+
+    def read(self, start, end, block=None):
+        """Return (start, end, offset, data) for a claimed range"""
+        if block is not None:
+            return start, end, start, block
+        offset, data = self.source.span(start, end)
+        return start, end, offset, data
+
+    def chunk(self, start, end, offset, data):
+        """Split the data of a range into a Chunk of candidates"""
+        words = self.source.split(data)
+        if self.rules is None:
+            return Chunk(start, end, offset, words, 1)
+        return Chunk(start, end, offset, self.rules.expand(words), len(self.rules))
+
+    def close(self):
+        """Stop the decompression pass this dispatcher started, if any"""
+        if self.feed is not None:
+            self.feed.close()
+
+    def __iter__(self):
+        while True:
+            chunk = self.next_chunk()
+            if chunk is None:
+                return
+            yield chunk
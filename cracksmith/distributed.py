@@ -0,0 +1,456 @@
+"""
+Distributed cracking over plain TCP
+
+A coordinator splits each job's keyspace (wordlist byte ranges or mask
+index ranges) into leases. Workers pull leases, crack them with their local
+engine, heartbeat progress and report hits. Leases of workers that stop
+heartbeating or disconnect are handed out again. Every message is a JSON
+object on its own line carrying the shared token; each request gets
+exactly one reply. Reported hits are verified before they are recorded.
+"""
+import os
+import hmac
+import json
+import time
+import queue
+import socket
+import secrets
+import threading
+import socketserver
+from itertools import count
+
+DEFAULT_PORT = 7878
+LEASE_CHUNKS = 64  # Chunks per lease, so a lease keeps a whole worker busy for a while
+HEARTBEAT = 2.0
+LEASE_TIMEOUT = 15.0
+WAIT = 1.0
+
+
+def parse_address(address, default_host="127.0.0.1"):
+    """Split "host:port", ":port" or "port" into (host, port)"""
+    host, _, port = str(address).rpartition(":")
+    return host or default_host, int(port or DEFAULT_PORT)
+
+
+class _Lease:
+    __slots__ = ("id", "start", "end", "worker", "deadline", "attempts")
+
+    def __init__(self, lease_id, start, end, worker):
+        self.id, self.start, self.end, self.worker = lease_id, start, end, worker
+        self.deadline = time.monotonic() + LEASE_TIMEOUT
+        self.attempts = 0
+
+
+class _LeaseCounts:
+    """Live attempt counts of a distributed job, summable like metrics.Counters slots"""
+
+    def __init__(self, job):
+        self.job = job
+
+    def __iter__(self):
+        with self.job.lock:
+            return iter([self.job.completed] + [lease.attempts for lease in self.job.leases.values()])
+
+
+class DistributedJob:
+    """One job served to remote workers, with the same interface as ProcessPool
+
+    spec describes the keyspace to workers: {"wordlist": path, "size": n,
+    "digest": ...} or {"mask": mask, "custom": {...}}. Results arrive as events that
+    refresh() folds into a CrackerStats.
+    """
+    _ids = count(1)
+
+    def __init__(self, coordinator, source, spec, targets, start=0, chunk_size=1, done=(), rules=None):
+        self.coordinator = coordinator
+        self.id = next(self._ids)
+        self.spec = spec
+        self.targets = [(t, h.decode()) for t, h in targets]
+        self.types = {h: t for t, h in self.targets}
+        self.cracked = set()
+        self.chunk_size = chunk_size
+        self.lease_size = chunk_size * LEASE_CHUNKS
+        self.rules = rules.lines if rules else None
+        self.cursor, self.end = start, source.size
+        self.done = sorted(tuple(r) for r in done)
+        self.requeued, self.leases = [], {}
+        self.completed = 0
+        self.counts = _LeaseCounts(self)
+        self.events = queue.Queue()
+        self.lock = threading.Lock()
+        self.stopped = False
+        self._lease_ids = count(1)
+
+    # --- ProcessPool interface, used by the cracker's main loop ---
+
+    def start(self):
+        self.coordinator.serve(self)
+
+    def alive(self):
+        with self.lock:
+            return not self._finished()
+
+    def refresh(self, stats=None, log=None):
+        """Requeue expired leases and fold worker events into stats and log"""
+        self.reap()
+        while True:
+            try:
+                kind, *data = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if stats is None:
+                continue
+            if kind == "found":
+                stats.record(*data)
+            elif kind == "chunk":
+                if log is not None:
+                    log.complete(*data)
+            else:
+                stats.last_passwords = [data[0]] + stats.last_passwords[:3]
+        if stats is not None and stats.done:
+            self.stopped = True
+
+    def shutdown(self, stats=None, log=None):
+        """Stop handing out leases and collect the results already reported"""
+        self.stopped = True
+        self.refresh(stats, log)
+        self.coordinator.serve(None)
+
+    # --- Lease bookkeeping, called by the coordinator under self.lock ---
+
+    def _finished(self):
+        if self.stopped or len(self.cracked) >= len(self.targets):
+            return True
+        return self.cursor >= self.end and not self.requeued and not self.leases
+
+    def pending(self):
+        return [[t, h] for t, h in self.targets if h not in self.cracked]
+
+    def _next_range(self):
+        if self.requeued:
+            return self.requeued.pop()
+        start = self.cursor
+        for a, b in self.done:
+            if a <= start < b:
+                start = b
+        end = min(start + self.lease_size, self.end)
+        for a, b in self.done:
+            if start < a < end:
+                end = a
+                break
+        self.cursor = max(start, end)
+        return (start, end) if start < self.end else None
+
+    def lease(self, worker):
+        rng = None if self._finished() else self._next_range()
+        if rng is None:
+            return None
+        lease = _Lease(next(self._lease_ids), *rng, worker)
+        self.leases[lease.id] = lease
+        return lease
+
+    def release(self, lease):
+        """Put an unfinished lease back for another worker"""
+        if self.leases.pop(lease.id, None) is not None:
+            self.requeued.append((lease.start, lease.end))
+
+    def reap(self):
+        """Requeue every lease whose worker stopped heartbeating"""
+        now = time.monotonic()
+        with self.lock:
+            for lease in [l for l in self.leases.values() if l.deadline < now]:
+                self.release(lease)
+
+    def nodes(self):
+        """Return a one-line summary of connected workers and active leases"""
+        with self.lock:
+            active = len(self.leases)
+        return f"{self.coordinator.worker_count()} connected, {active} leases active"
+
+
+class Coordinator:
+    """TCP server handing out the leases of the current DistributedJob
+
+    Workers must send token with every message; without one, a random
+    token is generated for the operator to pass on.
+    """
+
+    def __init__(self, address, token=None, log=print):
+        self.job = None
+        self.closed = False
+        self.token = token or secrets.token_urlsafe(16)
+        self.log = log
+        self.workers = {}
+        self.lock = threading.Lock()
+        self.server = _Server(address, _Handler)
+        self.server.coordinator = self
+        self.address = self.server.server_address
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def serve(self, job):
+        """Make job the one workers pull leases from (None between jobs)"""
+        self.job = job
+
+    def worker_count(self):
+        with self.lock:
+            return len(self.workers)
+
+    def close(self):
+        """Tell workers there is no more work and stop listening"""
+        self.closed, self.job = True, None
+        deadline = time.monotonic() + HEARTBEAT + WAIT
+        while self.worker_count() and time.monotonic() < deadline:
+            time.sleep(0.1)  # Give polling workers a chance to hear "bye"
+        self.server.shutdown()
+        self.server.server_close()
+
+    def connect(self, worker, name):
+        with self.lock:
+            self.workers[worker] = name
+
+    def disconnect(self, worker):
+        with self.lock:
+            self.workers.pop(worker, None)
+        job = self.job
+        if job is not None:
+            with job.lock:
+                for lease in [l for l in job.leases.values() if l.worker == worker]:
+                    job.release(lease)
+
+    def authorized(self, msg):
+        return hmac.compare_digest(str(msg.get("token", "")).encode(), self.token.encode())
+
+    def verify(self, worker, job, target, password):
+        """Return True if password cracks target, logging reports that do not"""
+        from cracksmith.engines import get_engine
+        engine = get_engine(job.types.get(target, ""))
+        if engine is None or not engine([target.encode()]).verify_many([password.encode('utf-8')]):
+            self.log(f"Rejected a report from {worker}: the password does not crack {target}")
+            return False
+        return True
+
+    def handle(self, worker, msg):
+        """Return the reply to one worker request"""
+        op, job = msg.get("op"), self.job
+        if op == "hello":
+            self.connect(worker, msg.get("name", worker))
+            return {"ok": True}
+        if op == "job":
+            from cracksmith.engines import PLUGINS
+            if job is None or not job.alive():
+                return {"bye": True} if self.closed else {"wait": WAIT}
+            with job.lock:
+                return {"job": job.id, "source": job.spec, "targets": job.pending(),
+                        "rules": job.rules, "chunk_size": job.chunk_size, "plugins": PLUGINS}
+        if job is None or msg.get("job") != job.id:
+            return {"done": True, "stop": True}
+        if op == "found":
+            # Checked before taking the job lock, as a slow hash would stall every worker
+            if not self.verify(worker, job, msg["target"], msg["password"]):
+                return {"error": "password does not match"}
+        with job.lock:
+            if op == "lease":
+                lease = job.lease(worker)
+                if lease is None:
+                    return {"done": True} if job._finished() else {"wait": WAIT}
+                return {"lease": lease.id, "start": lease.start, "end": lease.end, "targets": job.pending()}
+            lease = job.leases.get(msg.get("lease"))
+            if op == "heartbeat":
+                if lease is not None:
+                    lease.deadline = time.monotonic() + LEASE_TIMEOUT
+                    lease.attempts = msg.get("attempts", lease.attempts)
+                if msg.get("sample"):
+                    job.events.put(("sample", msg["sample"]))
+                return {"stop": lease is None or job._finished()}
+            if op == "found":
+                job.cracked.add(msg["target"])
+                job.events.put(("found", msg["target"].encode(), msg["password"], msg["offset"]))
+                return {"ok": True}
+            if op == "complete":
+                if lease is not None:
+                    del job.leases[lease.id]
+                    job.completed += msg.get("attempts", 0)
+                    job.events.put(("chunk", lease.start, lease.end))
+                return {"ok": True}
+        return {"error": f"unknown op {op!r}"}
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        coordinator, worker = self.server.coordinator, "%s:%d" % self.client_address[:2]
+        try:
+            for line in self.rfile:
+                try:
+                    msg = json.loads(line)
+                    if not isinstance(msg, dict) or not coordinator.authorized(msg):
+                        coordinator.log(f"Refused {worker}: wrong or missing token")
+                        self.wfile.write(json.dumps({"error": "unauthorized"}).encode() + b"\n")
+                        return
+                    reply = coordinator.handle(worker, msg)
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    reply = {"error": str(e)}
+                self.wfile.write(json.dumps(reply).encode() + b"\n")
+        except OSError:
+            pass
+        finally:
+            coordinator.disconnect(worker)
+
+
+# --- Worker side ---
+
+class _Client:
+    """One line-delimited JSON connection to a coordinator, safe to share between threads"""
+
+    def __init__(self, address, token):
+        self.sock = socket.create_connection(address)
+        self.rfile = self.sock.makefile('rb')
+        self.token = token
+        self.lock = threading.Lock()
+
+    def call(self, **msg):
+        with self.lock:
+            self.sock.sendall(json.dumps({**msg, "token": self.token}).encode() + b"\n")
+            line = self.rfile.readline()
+        if not line:
+            raise ConnectionError("coordinator closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+class _LeaseStats:
+    """Minimal CrackerStats stand-in that forwards hits of one lease to the coordinator"""
+
+    def __init__(self, client, job, targets, slots):
+        from cracksmith.metrics import Counters
+        self.client, self.job = client, job
+        self.targets = len(targets)
+        self.counters = Counters(slots)
+        self.cracked = {}
+        self.last_passwords = []
+        self.lock = threading.Lock()
+
+    @property
+    def done(self):
+        return len(self.cracked) >= self.targets
+
+    def record(self, target, password, offset):
+        with self.lock:
+            if target in self.cracked:
+                return
+            self.cracked[target] = password
+        self.client.call(op="found", job=self.job, target=target.decode(), password=password, offset=offset)
+
+
+def _open_source(spec, wordlist=None):
+    if "mask" in spec:
+        from cracksmith.mask import Mask
+        return Mask(spec["mask"], {int(k): v for k, v in spec.get("custom", {}).items()})
+    from cracksmith.wordlist import open_wordlist
+    path = spec["wordlist"] if os.path.exists(spec["wordlist"]) or not wordlist else wordlist
+    source = open_wordlist(path)
+    if source.size != spec["size"] or getattr(source, "digest", None) != spec.get("digest"):
+        source.close()
+        raise ValueError(f"{path} does not match the coordinator's wordlist {spec['wordlist']}")
+    return source
+
+
+def _crack_lease(client, job, lease, source, rules, chunk_size, workers, engine):
+    """Crack one lease with the local engine; return its attempts, or None if told to stop"""
+    from cracksmith.dispatch import ChunkDispatcher
+    from cracksmith.engines import EngineSet
+    from cracksmith.procpool import ProcessPool
+
+    targets = [(t, h.encode()) for t, h in lease["targets"]]
+    start, end = lease["start"], lease["end"]
+    pool = ProcessPool(source, targets, workers, start, chunk_size, rules=rules, end=end) if engine == "process" else None
+    stats = _LeaseStats(client, job, targets, pool.counts if pool else workers)
+    stop = threading.Event()
+
+    def work(dispatcher, matcher, slot):
+        while not stop.is_set() and not stats.done:
+            chunk = dispatcher.next_chunk()
+            if chunk is None:
+                break
+            pwds = chunk.candidates
+            for j, target in matcher(pwds):
+                stats.record(target, pwds[j].decode('utf-8', 'ignore'), source.line_offset(chunk.offset, j // chunk.fanout))
+            stats.counters.add(slot, len(pwds))
+            if pwds:
+                stats.last_passwords = [pwds[-1].decode('utf-8', 'ignore')[:25]]
+
+    if pool:
+        pool.start()
+        alive = pool.alive
+    else:
+        dispatcher = ChunkDispatcher(source, start, end, chunk_size, rules=rules)
+        matcher = EngineSet(targets)
+        threads = [threading.Thread(target=work, args=(dispatcher, matcher, i), daemon=True) for i in range(workers)]
+        for t in threads:
+            t.start()
+        alive = lambda: any(t.is_alive() for t in threads)
+    beat = time.monotonic()
+    while alive() and not stop.is_set():
+        time.sleep(0.1)
+        if pool:
+            pool.refresh(stats)
+        if time.monotonic() - beat >= HEARTBEAT:
+            beat = time.monotonic()
+            sample = stats.last_passwords[0] if stats.last_passwords else None
+            if client.call(op="heartbeat", job=job, lease=lease["lease"], attempts=stats.counters.total(), sample=sample).get("stop"):
+                stop.set()
+    cancelled = stop.is_set()
+    if pool:
+        pool.shutdown(stats)
+    else:
+        stop.set()
+        for t in threads:
+            t.join()
+    return None if cancelled else stats.counters.total()
+
+
+def join(address, token, workers, engine="thread", wordlist=None, log=print):
+    """Work for the coordinator at address until it says goodbye"""
+    from cracksmith.engines import load_plugins
+    from cracksmith.rules import RuleSet
+
+    client = _Client(address, token)
+    try:
+        if "error" in client.call(op="hello", name=f"{socket.gethostname()}:{os.getpid()}"):
+            raise ValueError("the coordinator refused the token")
+        while True:
+            reply = client.call(op="job")
+            if reply.get("bye"):
+                return
+            if "wait" in reply:
+                time.sleep(reply["wait"])
+                continue
+            job = reply["job"]
+            for name, error in load_plugins(reply.get("plugins", ()), discover=False).items():
+                log(f"Plugin {name} failed to load: {error}")
+            rules = RuleSet(reply["rules"]) if reply.get("rules") else None
+            with _open_source(reply["source"], wordlist) as source:
+                chunk_size = max(1, reply["chunk_size"])
+                log(f"Joined job {job}: {len(reply['targets']):,} targets")
+                while True:
+                    lease = client.call(op="lease", job=job)
+                    if lease.get("done"):
+                        break
+                    if "wait" in lease:
+                        time.sleep(lease["wait"])
+                        continue
+                    attempts = _crack_lease(client, job, lease, source, rules, chunk_size, workers, engine)
+                    if attempts is not None:
+                        client.call(op="complete", job=job, lease=lease["lease"], attempts=attempts)
+                        log(f"Lease {lease['lease']} [{lease['start']:,}, {lease['end']:,}) done, {attempts:,} attempts")
+    except (ConnectionError, OSError):
+        return  # The coordinator finished and went away
+    finally:
+        client.close()
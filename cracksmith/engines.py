@@ -0,0 +1,585 @@
+"""
+Hash engine registry shared by the terminal cracker and the backend
+
+Every engine detects its hashes, parses its targets once and verifies
+candidate batches against them, so adding an algorithm only means
+registering a new engine class. Engines outside this package are plugins:
+modules that register their engines on import, found through the
+"cracksmith.engines" entry point group or listed by name.
+"""
+import os
+import re
+import time
+import base64
+import hashlib
+import importlib
+import functools
+import threading
+
+from cracksmith import crypts
+
+ENGINES = {}
+FAST_HASHES = []  # Unsalted engines, which all share one wordlist pass
+PLUGINS = []  # Plugin modules imported so far, for worker processes to import too
+PLUGIN_GROUP = "cracksmith.engines"
+HEX = re.compile(rb"[0-9a-fA-F]+")
+_detectors = None
+
+
+def register(cls):
+    """Class decorator that makes an engine available by its name"""
+    global _detectors
+    ENGINES[cls.name] = cls
+    if not cls.salted and cls.name not in FAST_HASHES:
+        FAST_HASHES.append(cls.name)
+    _detectors = None
+    return cls
+
+
+def get_engine(name):
+    """Return the engine class registered for a hash type, or None"""
+    return ENGINES.get(name)
+
+
+def load_plugins(modules=(), discover=True):
+    """Import engine plugins and return {name: error} for those that failed
+
+    With discover, every entry point in the cracksmith.engines group is
+    loaded as well. Worker processes pass PLUGINS without discovery.
+    """
+    names, errors = list(modules), {}
+    if discover:
+        from importlib.metadata import entry_points
+        eps = entry_points()
+        eps = eps.select(group=PLUGIN_GROUP) if hasattr(eps, "select") else eps.get(PLUGIN_GROUP, [])
+        names += [ep.value.partition(":")[0] for ep in eps]
+    for name in names:
+        if name in PLUGINS:
+            continue
+        try:
+            importlib.import_module(name)
+            PLUGINS.append(name)
+        except Exception as e:  # A broken plugin must not take the cracker down
+            errors[name] = e
+    return errors
+
+
+def detect_hash_type(h):
+    """Return the name of the engine that recognises a normalised hash, or "unknown"
+
+    Prefixed formats ($6$, $argon2id$, ...) and plain hex digests of a known
+    length are resolved by table; engines with a custom detect() are asked
+    last, in registration order.
+    """
+    global _detectors
+    h = h.encode() if isinstance(h, str) else h
+    if _detectors is None:
+        prefixes, lengths, custom = [], {}, []
+        for cls in ENGINES.values():
+            prefixes += [(p, cls.name) for p in cls.prefixes]
+            if cls.hex_length:
+                lengths.setdefault(cls.hex_length, cls.name)
+            if cls.detect.__func__ is not HashEngine.detect.__func__:
+                custom.append(cls)
+        _detectors = tuple(p for p, _ in prefixes), prefixes, lengths, custom
+    starts, prefixes, lengths, custom = _detectors
+    if starts and h.startswith(starts):
+        for prefix, name in prefixes:
+            if h.startswith(prefix):
+                return name
+    name = lengths.get(len(h))
+    if name and HEX.fullmatch(h):
+        return name
+    for cls in custom:
+        if cls.detect(h):
+            return cls.name
+    return "unknown"
+
+
+class HashEngine:
+    """Base class for hash engines
+
+    Subclasses set name, declare how their hashes are recognised (prefixes,
+    hex_length or a detect() override), implement parse() to turn a target
+    into whatever form is cheapest to compare against, and verify_many() to
+    check a batch of candidates against every pending target.
+    """
+    name = None
+    salted = False  # Unsalted engines can check any number of targets per candidate hash
+    prefixes = ()  # Leading identifiers of the hash format, e.g. (b"$6$",)
+    hex_length = None  # Length of a bare hex digest; the first engine registered for a length wins
+    requires = None  # Package the engine needs beyond the standard library, if any
+    parallel = False  # Hashing releases the GIL, so thread workers scale with their count
+
+    def __init__(self, targets):
+        self.pending = {}
+        for target in targets:
+            try:
+                self.pending[self.parse(target)] = target
+            except ValueError:
+                continue  # Malformed target that no candidate can ever match
+
+    @classmethod
+    def detect(cls, target):
+        """Return True if a hash matches no prefix or hex length but is one of this engine's"""
+        return False
+
+    @classmethod
+    def available(cls):
+        """Return True if what the engine requires is installed"""
+        return True
+
+    @classmethod
+    def parse(cls, target):
+        """Return the parsed form of a target hash given as bytes"""
+        raise NotImplementedError
+
+    @classmethod
+    def hash(cls, password, cost=None):
+        """Return a target hash of a password, for known-answer tests and benchmarks"""
+        raise NotImplementedError
+
+    @classmethod
+    def schedule(cls, targets):
+        """Split targets into jobs of one wordlist pass each, cheapest first
+
+        Unsalted targets all share a single pass; salted ones default to a
+        pass per target.
+        """
+        targets = list(dict.fromkeys(targets))
+        return [targets] if not cls.salted else [[t] for t in targets]
+
+    @classmethod
+    def estimate(cls, targets):
+        """Return the estimated seconds to check one candidate against a job, or None"""
+        return None
+
+    def verify_many(self, candidates):
+        """Return (index, target) for every candidate that cracks a pending target"""
+        raise NotImplementedError
+
+
+class DigestEngine(HashEngine):
+    """Unsalted hashlib digest compared as raw bytes against a set of targets"""
+    algo = None
+
+    @classmethod
+    def digest(cls, password):
+        """Return the raw digest of a candidate"""
+        return cls.algo(password).digest()
+
+    @classmethod
+    def parse(cls, target):
+        raw = bytes.fromhex(target.decode())
+        if len(raw) * 2 != cls.hex_length:
+            raise ValueError(f"not a {cls.name} digest")
+        return raw
+
+    @classmethod
+    def hash(cls, password, cost=None):
+        return cls.digest(password).hex().encode()
+
+    def verify_many(self, candidates):
+        algo, pending, hits = self.algo, self.pending, []
+        if not pending:
+            return hits
+        for j, pwd in enumerate(candidates):
+            # Popping drops cracked targets so later batches stop looking for them
+            target = pending.pop(algo(pwd).digest(), None)
+            if target is not None:
+                hits.append((j, target))
+        return hits
+
+
+@register
+class MD5Engine(DigestEngine):
+    name = "md5"
+    algo = hashlib.md5
+    hex_length = 32
+
+
+@register
+class SHA1Engine(DigestEngine):
+    name = "sha1"
+    algo = hashlib.sha1
+    hex_length = 40
+
+
+@register
+class SHA256Engine(DigestEngine):
+    name = "sha256"
+    algo = hashlib.sha256
+    hex_length = 64
+
+
+@register
+class SHA512Engine(DigestEngine):
+    name = "sha512"
+    algo = hashlib.sha512
+    hex_length = 128
+
+
+@register
+class NTLMEngine(DigestEngine):
+    """NT hash, MD4 of the UTF-16LE password
+
+    Bare 32-digit hex reads as md5, so NTLM targets come from pwdump lines,
+    John's $NT$ prefix or --hash-type ntlm.
+    """
+    name = "ntlm"
+    prefixes = (b"$NT$",)
+    hex_length = 32
+
+    @classmethod
+    def digest(cls, password):
+        return crypts.ntlm(password)
+
+    @classmethod
+    def parse(cls, target):
+        return super().parse(target[4:] if target.startswith(b"$NT$") else target)
+
+    def verify_many(self, candidates):
+        pending, hits = self.pending, []
+        if not pending:
+            return hits
+        md4, words = crypts.md4, None
+        try:
+            # One decode per batch; the per-candidate work is the encode and MD4
+            words = b"\n".join(candidates).decode('utf-8').split("\n")
+        except UnicodeDecodeError:
+            pass
+        if words is not None and len(words) == len(candidates):
+            words = [w.encode('utf-16-le') for w in words]
+        else:
+            words = [crypts.utf16(pwd) for pwd in candidates]
+        for j, word in enumerate(words):
+            target = pending.pop(md4(word), None)
+            if target is not None:
+                hits.append((j, target))
+        return hits
+
+
+BCRYPT_HASH = re.compile(rb"^\$2[aby]\$(\d\d)\$[./A-Za-z0-9]{53}$")
+BCRYPT_SALT = 29  # "$2b$" + two cost digits + "$" + 22 salt characters
+CALIBRATE_COST = 5
+CALIBRATE_SAMPLES = 5  # estimate() takes the median of this many timings
+
+
+def _median_seconds(fn, *args):
+    """Return the median wall time of CALIBRATE_SAMPLES calls of fn"""
+    times = []
+    for _ in range(CALIBRATE_SAMPLES):
+        t0 = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - t0)
+    return sorted(times)[len(times) // 2]
+
+
+@register
+class BcryptEngine(HashEngine):
+    """bcrypt targets grouped by salt, so each candidate is hashed once per salt"""
+    name = "bcrypt"
+    salted = True
+    prefixes = (b"$2a$", b"$2b$", b"$2y$")
+    requires = "bcrypt"
+    _unit = None  # Measured seconds per bcrypt round, see estimate()
+
+    def __init__(self, targets):
+        super().__init__(targets)
+        self.groups = {}
+        for nhash, target in self.pending.items():
+            self.groups.setdefault(nhash[:BCRYPT_SALT], {})[nhash] = target
+
+    @classmethod
+    def parse(cls, target):
+        if not BCRYPT_HASH.match(target):
+            raise ValueError("not a bcrypt hash")
+        return target.replace(b"$2y$", b"$2b$", 1)
+
+    @classmethod
+    def available(cls):
+        try:
+            import bcrypt  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @classmethod
+    def hash(cls, password, cost=None):
+        import bcrypt
+        return bcrypt.hashpw(password, bcrypt.gensalt(cost or 12))
+
+    @staticmethod
+    def cost(target):
+        """Return the log2 round count of a bcrypt hash"""
+        return int(target[4:6])
+
+    @classmethod
+    def schedule(cls, targets):
+        """Group targets by salt, cheapest cost first and larger groups first within a cost"""
+        groups = {}
+        for target in dict.fromkeys(targets):
+            try:
+                groups.setdefault(cls.parse(target)[:BCRYPT_SALT], []).append(target)
+            except ValueError:
+                continue  # Malformed, no wordlist pass can crack it
+        return sorted(groups.values(), key=lambda g: (cls.cost(g[0]), -len(g)))
+
+    @classmethod
+    def estimate(cls, targets):
+        # One hashpw per candidate and salt; its time doubles with every cost step
+        if cls._unit is None:
+            import bcrypt
+            salt = bcrypt.gensalt(CALIBRATE_COST)
+            cls._unit = _median_seconds(bcrypt.hashpw, b"calibrate", salt) / 2 ** CALIBRATE_COST
+        salts = {cls.parse(t)[:BCRYPT_SALT] for t in targets}
+        return sum(cls._unit * 2 ** cls.cost(salt) for salt in salts)
+
+    def verify_many(self, candidates):
+        import bcrypt
+        hits = []
+        for salt, group in list(self.groups.items()):
+            for j, pwd in enumerate(candidates):
+                if not group:
+                    break
+                try:
+                    digest = bcrypt.hashpw(pwd, salt)
+                except ValueError:
+                    if len(pwd) > 72:
+                        continue  # Longer than bcrypt accepts, cannot match
+                    for nhash in group:
+                        self.pending.pop(nhash, None)  # Invalid salt, can never match
+                    group.clear()
+                    break
+                target = group.pop(digest, None)
+                if target is not None and self.pending.pop(digest, None) is not None:
+                    hits.append((j, target))
+            if not group:
+                self.groups.pop(salt, None)
+        return hits
+
+
+_pool = None  # (pid, executor) shared by the parallel engines of this process
+_pool_lock = threading.Lock()
+
+
+def _executor():
+    """Return the thread pool parallel KDFs spread a batch over, one per process"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool[0] != os.getpid():
+            from concurrent.futures import ThreadPoolExecutor
+            _pool = (os.getpid(), ThreadPoolExecutor(os.cpu_count() or 4, thread_name_prefix="kdf"))
+        return _pool[1]
+
+
+class KdfEngine(HashEngine):
+    """Salted key derivation function, derived once per candidate and setting
+
+    parse() returns (setting, digest), where the setting holds the salt and
+    cost parameters; targets sharing a setting are checked with a single
+    derivation per candidate. Engines whose derive() releases the GIL set
+    parallel, and their batches are spread over a per-process thread pool.
+    """
+    salted = True
+    calibration = None  # A cheap setting timed by estimate()
+    _unit = None  # Measured seconds per cost unit
+
+    def __init__(self, targets):
+        super().__init__(targets)
+        self.groups = {}
+        for (setting, digest), target in self.pending.items():
+            self.groups.setdefault(setting, {})[digest] = target
+
+    @classmethod
+    def derive(cls, password, setting):
+        """Return the digest of a candidate under a setting, comparable to parse()'s"""
+        raise NotImplementedError
+
+    @classmethod
+    def cost(cls, setting):
+        """Return the work of one derivation in arbitrary units, e.g. iterations"""
+        return 1
+
+    @classmethod
+    def schedule(cls, targets):
+        """Group targets by setting, cheapest first and larger groups first within a cost"""
+        groups = {}
+        for target in dict.fromkeys(targets):
+            try:
+                groups.setdefault(cls.parse(target)[0], []).append(target)
+            except ValueError:
+                continue  # Malformed, no wordlist pass can crack it
+        return [g for _, g in sorted(groups.items(), key=lambda item: (cls.cost(item[0]), -len(item[1])))]
+
+    @classmethod
+    def estimate(cls, targets):
+        if cls._unit is None:
+            cls._unit = _median_seconds(cls.derive, b"calibrate", cls.calibration) / cls.cost(cls.calibration)
+        settings = {cls.parse(t)[0] for t in targets}
+        return sum(cls._unit * cls.cost(setting) for setting in settings)
+
+    def verify_many(self, candidates):
+        hits = []
+        for setting, group in list(self.groups.items()):
+            derive = functools.partial(self.derive, setting=setting)
+            if self.parallel and len(candidates) > 1:
+                digests = _executor().map(derive, candidates)
+            else:
+                digests = map(derive, candidates)
+            for j, digest in enumerate(digests):
+                target = group.pop(digest, None)
+                if target is not None and self.pending.pop((setting, digest), None) is not None:
+                    hits.append((j, target))
+                    if not group:
+                        break
+            if not group:
+                self.groups.pop(setting, None)
+        return hits
+
+
+PBKDF2_PASSLIB = re.compile(rb"^\$pbkdf2-sha256\$(\d+)\$([./A-Za-z0-9]*)\$([./A-Za-z0-9]{43})$")
+PBKDF2_DJANGO = re.compile(rb"^pbkdf2_sha256\$(\d+)\$([^$]*)\$([A-Za-z0-9+/]{43}=)$")
+
+
+@register
+class PBKDF2SHA256Engine(KdfEngine):
+    """PBKDF2-HMAC-SHA256 in passlib ($pbkdf2-sha256$) and Django (pbkdf2_sha256$) form"""
+    name = "pbkdf2-sha256"
+    prefixes = (b"$pbkdf2-sha256$", b"pbkdf2_sha256$")
+    parallel = True  # hashlib drops the GIL while deriving
+    calibration = (1000, b"calibrate", 32)
+
+    @classmethod
+    def parse(cls, target):
+        m = PBKDF2_PASSLIB.match(target)
+        if m:
+            salt, digest = crypts.ab64_decode(m.group(2)), crypts.ab64_decode(m.group(3))
+        else:
+            m = PBKDF2_DJANGO.match(target)
+            if not m:
+                raise ValueError("not a pbkdf2-sha256 hash")
+            salt, digest = m.group(2), base64.b64decode(m.group(3))
+        rounds = int(m.group(1))
+        if not rounds:
+            raise ValueError("pbkdf2-sha256 needs at least one round")
+        return (rounds, salt, len(digest)), digest
+
+    @classmethod
+    def derive(cls, password, setting):
+        rounds, salt, size = setting
+        return hashlib.pbkdf2_hmac("sha256", password, salt, rounds, size)
+
+    @classmethod
+    def cost(cls, setting):
+        return setting[0]
+
+    @classmethod
+    def hash(cls, password, cost=None):
+        rounds, salt = cost or 29000, os.urandom(16)
+        digest = cls.derive(password, (rounds, salt, 32))
+        return b"$pbkdf2-sha256$%d$%s$%s" % (rounds, crypts.ab64_encode(salt), crypts.ab64_encode(digest))
+
+
+SHA512_CRYPT = re.compile(rb"^\$6\$(?:rounds=(\d+)\$)?([^$]*)\$([./0-9A-Za-z]{86})$")
+
+
+@register
+class SHA512CryptEngine(KdfEngine):
+    """sha512crypt ($6$), the glibc crypt() default, in pure Python"""
+    name = "sha512crypt"
+    prefixes = (b"$6$",)
+    calibration = (1000, b"calibrate")
+
+    @classmethod
+    def parse(cls, target):
+        m = SHA512_CRYPT.match(target)
+        if not m:
+            raise ValueError("not a sha512crypt hash")
+        rounds = int(m.group(1)) if m.group(1) else crypts.SHA512_CRYPT_ROUNDS
+        rounds = min(max(rounds, crypts.SHA512_CRYPT_MIN_ROUNDS), crypts.SHA512_CRYPT_MAX_ROUNDS)
+        return (rounds, m.group(2)[:16]), m.group(3)
+
+    @classmethod
+    def derive(cls, password, setting):
+        return crypts.sha512_crypt(password, setting[1], setting[0])
+
+    @classmethod
+    def cost(cls, setting):
+        return setting[0]
+
+    @classmethod
+    def hash(cls, password, cost=None):
+        salt = crypts.ab64_encode(os.urandom(12))[:16]
+        rounds = b"rounds=%d$" % cost if cost else b""
+        return b"$6$%s%s$%s" % (rounds, salt, cls.derive(password, (cost or crypts.SHA512_CRYPT_ROUNDS, salt)))
+
+
+ARGON2 = re.compile(rb"^\$(argon2(?:id|i|d))\$(?:v=(\d+)\$)?m=(\d+),t=(\d+),p=(\d+)\$([A-Za-z0-9+/]+)\$([A-Za-z0-9+/]+)$")
+
+
+@register
+class Argon2Engine(KdfEngine):
+    """Argon2 (i, d, id) in PHC string form, through the optional argon2-cffi package"""
+    name = "argon2"
+    prefixes = (b"$argon2id$", b"$argon2i$", b"$argon2d$")
+    requires = "argon2-cffi"
+    parallel = True  # argon2-cffi drops the GIL while hashing
+    calibration = ("argon2id", 19, 8192, 1, 1, b"calibrate", 32)
+
+    @classmethod
+    def available(cls):
+        try:
+            import argon2.low_level  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @classmethod
+    def parse(cls, target):
+        m = ARGON2.match(target)
+        if not m:
+            raise ValueError("not an argon2 hash")
+        digest = crypts.b64_decode(m.group(7))
+        version = int(m.group(2)) if m.group(2) else 0x10
+        return (m.group(1).decode(), version, int(m.group(3)), int(m.group(4)), int(m.group(5)),
+                crypts.b64_decode(m.group(6)), len(digest)), digest
+
+    @classmethod
+    def derive(cls, password, setting):
+        from argon2.low_level import Type, hash_secret_raw
+        variant, version, memory, rounds, lanes, salt, size = setting
+        kind = {"argon2id": Type.ID, "argon2i": Type.I, "argon2d": Type.D}[variant]
+        return hash_secret_raw(password, salt, time_cost=rounds, memory_cost=memory, parallelism=lanes,
+                               hash_len=size, type=kind, version=version)
+
+    @classmethod
+    def cost(cls, setting):
+        return setting[2] * setting[3]  # Memory blocks filled per pass, times passes
+
+    @classmethod
+    def hash(cls, password, cost=None):
+        from argon2.low_level import Type, hash_secret
+        return hash_secret(password, os.urandom(16), time_cost=cost or 3, memory_cost=65536,
+                           parallelism=4, hash_len=32, type=Type.ID)
+
+
+class EngineSet:
+    """Verifies candidate chunks against targets of several hash types at once"""
+
+    def __init__(self, targets):
+        grouped = {}
+        for hash_type, target in targets:
+            grouped.setdefault(hash_type, []).append(target)
+        self.engines = [ENGINES[t](group) for t, group in grouped.items() if t in ENGINES]
+
+    @property
+    def pending(self):
+        return sum(len(engine.pending) for engine in self.engines)
+
+    def __call__(self, candidates):
+        """Return (index, target) hits from every engine, in candidate order"""
+        hits = []
+        for engine in self.engines:
+            hits.extend(engine.verify_many(candidates))
+        return sorted(hits)
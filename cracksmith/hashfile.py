@@ -0,0 +1,211 @@
+"""
+Hashfile ingestion: dump formats, normalisation, dedup and per-algorithm batches
+
+A hashfile is streamed line by line. Each line may be a bare hash, a
+user:hash dump line (including shadow and pwdump layouts) or a $id$ crypt
+string. Hashes are normalised once (lowercase hex, $2y$ as $2b$) and
+deduplicated, so memory grows with the unique hashes rather than the lines.
+Usernames are not held in memory: they are collected for the cracked
+hashes only, by a second pass over the file when the report is written.
+"""
+import re
+
+from cracksmith.engines import detect_hash_type
+
+HEX = re.compile(rb"[0-9a-fA-F]+")
+MAX_EXAMPLES = 5  # Unrecognised lines quoted in the summary
+READ_BLOCK = 1 << 22
+
+
+def normalize(h):
+    """Return the canonical bytes form of a hash: lowercase hex, $2b$ for bcrypt
+
+    Formats with "$" fields (crypt, PHC, Django) are case-sensitive and kept.
+    """
+    if b"$" in h:
+        return b"$2b$" + h[4:] if h.startswith(b"$2y$") else h
+    return h.lower()
+
+
+def locate_hash(fields):
+    """Return (index, type hint) of the hash among the fields of a dump line, or None
+
+    The type hint is set when the layout itself says what the hash is,
+    e.g. the NT field of a pwdump line; otherwise it is None.
+    """
+    # pwdump: user:rid:lm:nt::: keeps the usable hash in the NT field
+    if len(fields) >= 4 and fields[1].isdigit() and len(fields[2]) == len(fields[3]) == 32:
+        return (3, "ntlm") if HEX.fullmatch(fields[3]) else None
+    for i in range(1, len(fields)):
+        if fields[i] and detect_hash_type(normalize(fields[i])) != "unknown":
+            return i, None
+    if detect_hash_type(normalize(fields[0])) != "unknown":
+        return 0, None  # hash:salt or hash:password, no user
+    return 1, None
+
+
+def parse_line(line):
+    """Return (user, hash, type hint) for one dump line, or None if it holds no hash"""
+    line = line.strip()
+    if not line or line.startswith(b"#"):
+        return None
+    if line.startswith(b"$") or b":" not in line:
+        return None, line, None  # Bare hash; crypt strings never start with a user
+    fields = line.split(b":")
+    found = locate_hash(fields)
+    if found is None:
+        return None
+    i, hint = found
+    return (fields[0] or None) if i else None, fields[i], hint
+
+
+class HashList:
+    """Unique hashes of a hashfile, batched by algorithm
+
+    path is the file the hashes came from, rescanned by users(); lines
+    given directly (e.g. --hash) keep their usernames in memory instead.
+    hash_type, if given, is taken for every hash instead of detecting it,
+    e.g. ntlm for bare hex that would otherwise read as md5.
+    """
+
+    def __init__(self, path=None, hash_type=None):
+        self.path = path
+        self.hash_type = hash_type
+        self.types = {}  # hash -> hash type, in file order
+        self.batches = {}  # hash type -> unique hashes in file order
+        self.lines = self.duplicates = self.unrecognized = 0
+        self.examples = []
+        self.field, self.hint = 1, None  # Where the last dump line kept its hash
+        self._users = None if path else {}
+
+    def __len__(self):
+        return len(self.types)
+
+    def feed(self, lines):
+        """Parse byte lines and record every hash not seen before"""
+        types, batches, users = self.types, self.batches, self._users
+        count = duplicates = 0
+        field = self.field
+        for line in lines:
+            count += 1
+            line = line.strip()
+            if not line or line.startswith(b"#"):
+                continue
+            hint = None
+            if b":" in line and not line.startswith(b"$"):
+                fields = line.split(b":")
+                # Dumps keep the hash in the same field on every line, so a known hash there is a repeat
+                if users is None and field < len(fields) and normalize(fields[field]) in types:
+                    duplicates += 1
+                    continue
+                found = locate_hash(fields)
+                if found is None:
+                    continue
+                field, hint = found
+                self.hint = hint
+                h = normalize(fields[field])
+                if users is not None and field and fields[0]:
+                    users.setdefault(h, []).append(fields[0].decode('utf-8', 'replace'))
+            else:
+                h, field, self.hint = normalize(line), 0, None
+            if h in types:
+                duplicates += 1
+                continue
+            hash_type = self.hash_type or hint or detect_hash_type(h)
+            if hash_type == "unknown":
+                self.unrecognized += 1
+                if len(self.examples) < MAX_EXAMPLES:
+                    self.examples.append(line[:80].decode('utf-8', 'replace'))
+                continue
+            types[h] = hash_type
+            batch = batches.get(hash_type)
+            if batch is None:
+                batches[hash_type] = batch = []
+            batch.append(h)
+        self.lines += count
+        self.duplicates += duplicates
+        self.field = field
+        return self
+
+    def feed_block(self, block):
+        """Ingest a block of whole lines, in bulk when they share the last line's layout
+
+        The hash field of every line is split out in one comprehension and only
+        hashes not seen before are looked at in Python. Blocks with
+        comments, other layouts or unrecognised hashes are parsed line by
+        line instead.
+        """
+        if self._users is None and b"#" not in block and self.types:
+            bulk = b"$" not in block  # Hex only, so the whole block can be lowercased at once
+            lines = (block.lower() if bulk else block).replace(b"\r", b"").split(b"\n")
+            if not lines[-1]:
+                lines.pop()
+            f = self.field
+            try:
+                hashes = [line.split(b":", f + 1)[f] for line in lines]
+            except IndexError:
+                hashes = None  # Some line has another layout
+            if hashes and all(hashes):
+                if not bulk:
+                    hashes = [normalize(h.strip()) for h in hashes]
+                fresh = [h for h in dict.fromkeys(hashes) if h not in self.types]
+                found = [(h, self.hash_type or self.hint or detect_hash_type(h)) for h in fresh]
+                if all(t != "unknown" for _, t in found):
+                    for h, hash_type in found:
+                        self.types[h] = hash_type
+                        self.batches.setdefault(hash_type, []).append(h)
+                    self.lines += len(lines)
+                    self.duplicates += len(lines) - len(fresh)
+                    return self
+        lines = block.split(b"\n")
+        return self.feed(lines[:-1] if not lines[-1] else lines)
+
+    def typed(self):
+        """Return every (hash type, hash) pair, batch by batch"""
+        return [(t, h) for t, batch in self.batches.items() for h in batch]
+
+    def drop(self, hashes):
+        """Remove hashes resolved elsewhere (e.g. from the potfile) from the batches
+
+        Their types are kept, so duplicates and the report still know them.
+        """
+        hashes = set(hashes)
+        for hash_type in list(self.batches):
+            self.batches[hash_type] = [h for h in self.batches[hash_type] if h not in hashes]
+            if not self.batches[hash_type]:
+                del self.batches[hash_type]
+
+    def users(self, hashes):
+        """Return {hash: [usernames]} for the given hashes, rescanning the file if needed"""
+        wanted = set(hashes)
+        if self._users is not None:
+            return {h: self._users[h] for h in wanted if self._users.get(h)}
+        found = {}
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if b":" not in line or line.startswith(b"$"):
+                    continue
+                parsed = parse_line(line)
+                if parsed and parsed[0] is not None and normalize(parsed[1]) in wanted:
+                    found.setdefault(normalize(parsed[1]), []).append(parsed[0].decode('utf-8', 'replace'))
+        return found
+
+
+def read_hashfile(path, hash_type=None):
+    """Stream a hashfile from disk into a HashList, in blocks of whole lines"""
+    hashes, carry = HashList(path, hash_type), b""
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(READ_BLOCK)
+            if not data:
+                break
+            data = carry + data
+            cut = data.rfind(b"\n") + 1
+            if cut:
+                data, carry = data[:cut], data[cut:]
+                hashes.feed_block(data)
+            else:
+                carry = data
+    if carry:
+        hashes.feed_block(carry)
+    return hashes
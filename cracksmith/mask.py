@@ -0,0 +1,151 @@
+"""
+Mask (brute-force) candidate source with an index-addressable keyspace
+
+A mask such as ?l?l?d?d?d maps every index in [0, size) to exactly one
+candidate, so any worker can generate any range without coordination.
+Mask implements the same interface as Wordlist, with candidate indices
+taking the place of byte offsets.
+"""
+import string
+from itertools import product
+
+CHARSETS = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "h": "0123456789abcdef",
+    "H": "0123456789ABCDEF",
+    "s": " " + string.punctuation,
+}
+CHARSETS["a"] = CHARSETS["l"] + CHARSETS["u"] + CHARSETS["d"] + CHARSETS["s"]
+# Largest number of trailing combinations precomputed as the fast-changing block
+TAIL_LIMIT = 1 << 16
+
+
+def _expand(spec, custom):
+    """Expand a custom charset definition, which may itself use ?l, ?d, ..."""
+    out, i = [], 0
+    while i < len(spec):
+        if spec[i] == "?" and i + 1 < len(spec):
+            key = spec[i + 1]
+            out.append(CHARSETS[key] if key in CHARSETS else "?" if key == "?" else None)
+            if out[-1] is None:
+                raise ValueError(f"unknown charset ?{key}")
+            i += 2
+        else:
+            out.append(spec[i])
+            i += 1
+    return "".join(out)
+
+
+def parse_mask(mask, custom=None):
+    """Return the list of per-position charsets (lists of single-byte values) for a mask"""
+    custom = {str(k): _expand(v, {}) for k, v in (custom or {}).items() if v}
+    positions, i = [], 0
+    while i < len(mask):
+        c = mask[i]
+        if c == "?":
+            if i + 1 >= len(mask):
+                raise ValueError("mask ends with a lone '?'")
+            key = mask[i + 1]
+            if key == "?":
+                chars = "?"
+            elif key == "b":
+                chars = None
+            elif key in CHARSETS:
+                chars = CHARSETS[key]
+            elif key in custom:
+                chars = custom[key]
+            else:
+                raise ValueError(f"unknown charset ?{key}")
+            i += 2
+        else:
+            chars = c
+            i += 1
+        if chars is None:
+            positions.append([bytes([b]) for b in range(256)])
+        else:
+            positions.append([ch.encode('utf-8') for ch in dict.fromkeys(chars)])
+    if not positions:
+        raise ValueError("empty mask")
+    return positions
+
+
+class Mask:
+    """Brute-force keyspace addressed by candidate index"""
+    unit = 8  # Offsets are candidates; chunk sizes are tuned in wordlist bytes (~8 per line)
+
+    def __init__(self, mask, custom=None):
+        self.charsets = parse_mask(mask, custom)
+        extra = " ".join(f"-{k} {v}" for k, v in sorted((custom or {}).items()) if v)
+        self.path = f"{mask} {extra}".strip()
+        self.mtime = 0
+        self.size = 1
+        for cs in self.charsets:
+            self.size *= len(cs)
+        self.total = self.size
+        # Trailing positions are enumerated once; each candidate is then one concatenation
+        k, block = 0, 1
+        while k < len(self.charsets) and block * len(self.charsets[-1 - k]) <= TAIL_LIMIT:
+            block *= len(self.charsets[-1 - k])
+            k += 1
+        k = max(k, 1)
+        self._head = self.charsets[:-k]
+        self._tail = [b"".join(p) for p in product(*self.charsets[-k:])]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def _prefix(self, block):
+        parts = []
+        for cs in reversed(self._head):
+            block, r = divmod(block, len(cs))
+            parts.append(cs[r])
+        return b"".join(reversed(parts))
+
+    def candidate(self, index):
+        """Return the candidate at a keyspace index"""
+        block, pos = divmod(index, len(self._tail))
+        return self._prefix(block) + self._tail[pos]
+
+    def generate(self, start, end):
+        """Return the candidates for indices [start, end) in one batch"""
+        tail, out = self._tail, []
+        block, pos = divmod(start, len(tail))
+        while start < end:
+            stop = min(len(tail), pos + end - start)
+            prefix = self._prefix(block)
+            out.extend([prefix + t for t in tail[pos:stop]] if prefix else tail[pos:stop])
+            start += stop - pos
+            block, pos = block + 1, 0
+        return out
+
+    # Wordlist-compatible interface: offsets are candidate indices
+
+    def align(self, pos):
+        return min(max(pos, 0), self.size)
+
+    def span(self, start, end):
+        start, end = self.align(start), self.align(end)
+        return start, (start, end)
+
+    def split(self, data):
+        return self.generate(*data)
+
+    def line_offset(self, offset, n):
+        return offset + n
+
+    def index_at(self, offset):
+        return offset
+
+    def offset_of(self, index):
+        return min(index, self.size)
+
+    def count_async(self, callback):
+        callback(self.size)
@@ -0,0 +1,87 @@
+"""
+Attempt counters and background system sampling for CrackSmith
+"""
+import threading
+from array import array
+
+
+class Counters:
+    """Per-worker attempt counters
+
+    Every worker only ever writes its own slot, so counting needs no lock and
+    stays exact. Pass a shared array (e.g. multiprocessing.RawArray) as slots
+    to count across processes.
+    """
+
+    def __init__(self, slots=1):
+        self.slots = array('q', [0] * slots) if isinstance(slots, int) else slots
+
+    def add(self, slot, n):
+        """Add n attempts to a worker's slot and return the slot's previous value"""
+        before = self.slots[slot]
+        self.slots[slot] = before + n
+        return before
+
+    def total(self):
+        """Return the exact number of attempts across all workers"""
+        return sum(self.slots)
+
+
+_gpu = []  # NVML handle of the first GPU, or None, once probed
+
+
+def gpu_handle():
+    """Return the NVML handle of the first GPU, or None; NVML is probed once per process"""
+    if not _gpu:
+        try:
+            import pynvml
+            pynvml.nvmlInit()
+            _gpu.append(pynvml.nvmlDeviceGetHandleByIndex(0))
+        except Exception:
+            _gpu.append(None)
+    return _gpu[0]
+
+
+class SystemSampler:
+    """Samples CPU, RAM and GPU load in a background thread a few times a second
+
+    The GPU is probed by the sampling thread, so creating a sampler costs nothing.
+    """
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.cpu = 0.0
+        self.mem = 0.0
+        self.gpu = 0.0
+        self.has_gpu = False
+        self._gpu_handle = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start sampling in the background"""
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the sampling thread"""
+        self._stop.set()
+
+    def sample(self):
+        """Take one CPU/RAM/GPU reading"""
+        import psutil
+        self.cpu = psutil.cpu_percent()
+        self.mem = psutil.virtual_memory().percent
+        if self._gpu_handle is not None:
+            import pynvml
+            self.gpu = pynvml.nvmlDeviceGetUtilizationRates(self._gpu_handle).gpu
+
+    def _run(self):
+        self._gpu_handle = gpu_handle()
+        self.has_gpu = self._gpu_handle is not None
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
@@ -0,0 +1,205 @@
+"""
+Asynchronous notifications for cracked hashes
+
+Events are queued without blocking the cracker and delivered by one
+background thread. Events that arrive close together are batched into a
+single message per sink. Delivery uses a pooled HTTP session with
+timeouts and retries with exponential backoff.
+"""
+import time
+import queue
+import threading
+from datetime import datetime, timedelta
+
+MAX_QUEUE = 1000
+MAX_BATCH = 500
+BATCH_WINDOW = 2.0
+TIMEOUT = 10.0
+RETRIES = 3
+BACKOFF = 1.0
+MAX_LISTED = 10  # Passwords spelled out per chat message
+TELEGRAM_API = "https://api.telegram.org"
+
+
+def cracked_items(events):
+    """Return every (target, password) pair across a batch of events"""
+    return [(t, p) for e in events for t, p in e.get("cracked", {}).items()]
+
+
+class Sink:
+    """Destination for batches of events; subclasses turn a batch into one HTTP request"""
+    name = None
+
+    def request(self, events):
+        """Return (url, json payload) delivering a batch"""
+        raise NotImplementedError
+
+
+class WebhookSink(Sink):
+    """Generic webhook receiving the raw events as JSON"""
+    name = "webhook"
+
+    def __init__(self, url):
+        self.url = url
+
+    def request(self, events):
+        return self.url, {"source": "CrackSmith", "events": events}
+
+
+class DiscordSink(Sink):
+    """Discord webhook receiving one embed per batch"""
+    name = "discord"
+
+    def __init__(self, url, logo=None):
+        self.url, self.logo = url, logo
+
+    def request(self, events):
+        found = cracked_items(events)
+        listed = "\n".join(f"`{p}`" for _, p in found[:MAX_LISTED])
+        if len(found) > MAX_LISTED:
+            listed += f"\n… and {len(found) - MAX_LISTED:,} more"
+        embed = {
+            "title": "🔐 CrackSmith Success",
+            "description": "Password cracked successfully!" if len(found) == 1 else f"{len(found):,} passwords cracked successfully!",
+            "color": 3066993,
+            "fields": [
+                {"name": "Password", "value": listed or "-", "inline": False},
+                {"name": "Attempts", "value": f"{sum(e.get('attempts', 0) for e in events):,}", "inline": True},
+                {"name": "Elapsed", "value": str(timedelta(seconds=int(sum(e.get('elapsed', 0) for e in events)))), "inline": True},
+                {"name": "ETA", "value": events[-1].get("eta", "-"), "inline": True}
+            ],
+            "footer": {"text": "CrackSmith by Lovsan"},
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        if self.logo:
+            embed["thumbnail"] = {"url": self.logo}
+        return self.url, {"embeds": [embed]}
+
+
+class TelegramSink(Sink):
+    """Telegram bot message to one chat per batch"""
+    name = "telegram"
+
+    def __init__(self, token, chat_id, api=TELEGRAM_API):
+        self.url = f"{api}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+
+    def request(self, events):
+        found = cracked_items(events)
+        lines = [f"🔐 CrackSmith: {len(found):,} password{'s' if len(found) != 1 else ''} cracked"]
+        lines += [f"{p}  ({t[:16]}…)" if len(t) > 16 else f"{p}  ({t})" for t, p in found[:MAX_LISTED]]
+        if len(found) > MAX_LISTED:
+            lines.append(f"… and {len(found) - MAX_LISTED:,} more")
+        lines.append(f"Attempts: {sum(e.get('attempts', 0) for e in events):,}")
+        return self.url, {"chat_id": self.chat_id, "text": "\n".join(lines)[:4096]}
+
+
+def sinks_from_settings(settings):
+    """Build every sink configured in settings.json"""
+    sinks = []
+    if settings.get("webhook"):
+        sinks.append(WebhookSink(settings["webhook"]))
+    if settings.get("discord_webhook"):
+        sinks.append(DiscordSink(settings["discord_webhook"], settings.get("discord_embed_logo")))
+    if settings.get("telegram_token") and settings.get("telegram_chat_id"):
+        sinks.append(TelegramSink(settings["telegram_token"], settings["telegram_chat_id"],
+                                  settings.get("telegram_api", TELEGRAM_API)))
+    return sinks
+
+
+class Notifier:
+    """Background dispatcher delivering batched events to every sink
+
+    notify() never blocks: when the bounded queue is full the event is
+    dropped and counted. close() flushes what is queued within a deadline.
+    log(message) reports deliveries and failures.
+    """
+
+    def __init__(self, sinks, log=None, maxsize=MAX_QUEUE, window=BATCH_WINDOW,
+                 timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF):
+        self.sinks, self.log = sinks, log or (lambda message: None)
+        self.window, self.timeout, self.retries, self.backoff = window, timeout, retries, backoff
+        self.queue = queue.Queue(maxsize)
+        self.dropped = self.sent = self.failed = 0
+        self._closing = threading.Event()
+        self._session = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_settings(cls, settings, log=None):
+        """Return a Notifier for the sinks in settings, or None if none are configured"""
+        sinks = sinks_from_settings(settings)
+        return cls(sinks, log) if sinks else None
+
+    def notify(self, event):
+        """Queue an event for delivery without waiting"""
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=TIMEOUT):
+        """Deliver queued events, waiting at most timeout seconds"""
+        self._closing.set()
+        self._thread.join(timeout)
+        if self._session is not None:
+            self._session.close()
+
+    def _batch(self):
+        """Block for the first event, then gather more until the window ends"""
+        while True:
+            try:
+                batch = [self.queue.get(timeout=0.2)]
+                break
+            except queue.Empty:
+                if self._closing.is_set():
+                    return None
+        deadline = time.monotonic() + (0 if self._closing.is_set() else self.window)
+        while len(batch) < MAX_BATCH:
+            try:
+                batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._batch()
+            if batch is None:
+                return
+            for sink in self.sinks:
+                self._deliver(sink, batch)
+
+    def session(self):
+        """Return the pooled HTTP session, created on first use"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(self.sinks), pool_maxsize=len(self.sinks))
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+        return self._session
+
+    def _deliver(self, sink, events):
+        url, payload = sink.request(events)
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                response = self.session().post(url, json=payload, timeout=self.timeout)
+            except Exception as e:  # Connection errors and timeouts are retried
+                error = e
+                continue
+            if response.status_code < 400:
+                self.sent += 1
+                self.log(f"[blue]💬 {sink.name} notified ({len(events):,} events)[/blue]")
+                return True
+            error = f"HTTP {response.status_code}"
+            if response.status_code != 429 and response.status_code < 500:
+                break  # The request itself is wrong, retrying will not help
+        self.failed += 1
+        self.log(f"[red]⚠️ {sink.name} notification failed:[/red] {error}")
+        return False
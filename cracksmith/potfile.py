@@ -0,0 +1,129 @@
+"""
+Potfile: persistent store of cracked hashes, checked before any work starts
+
+Cracks are appended to a plain hash:password text file (hashcat-compatible,
+safe to edit or merge by hand). An SQLite index next to it is brought up to
+date incrementally from the text file and answers bulk lookups.
+"""
+import os
+import sqlite3
+import threading
+
+from cracksmith.hashfile import normalize
+
+DEFAULT_POTFILE = "cracksmith.pot"
+INDEX_SUFFIX = ".db"
+LOOKUP_BATCH = 50000
+
+
+def normalize_hash(h):
+    """Return the canonical key for a hash, normalised as hashfiles are"""
+    h = h.encode('utf-8') if isinstance(h, str) else h
+    return normalize(h.strip()).decode('utf-8', 'ignore')
+
+
+def encode_password(password):
+    """Escape passwords that would break the one-line format, like hashcat's $HEX[...]"""
+    if any(c in password for c in "\r\n") or password.startswith("$HEX["):
+        return f"$HEX[{password.encode('utf-8').hex()}]"
+    return password
+
+
+def decode_password(field):
+    if field.startswith("$HEX[") and field.endswith("]"):
+        return bytes.fromhex(field[5:-1]).decode('utf-8', 'ignore')
+    return field
+
+
+class Potfile:
+    """Append-only potfile with an SQLite hash index"""
+
+    def __init__(self, path=DEFAULT_POTFILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path + INDEX_SUFFIX, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS pot (hash TEXT PRIMARY KEY, password TEXT NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._db.commit()
+        self.sync()
+
+    def close(self):
+        self._db.close()
+
+    def _indexed(self):
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'offset'").fetchone()
+        return row[0] if row else 0
+
+    def sync(self):
+        """Index any lines appended to the text potfile since the last sync"""
+        with self._lock:
+            offset = self._indexed()
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                return
+            if size < offset:
+                # The text file was truncated or replaced: rebuild the index
+                self._db.execute("DELETE FROM pot")
+                offset = 0
+            if size == offset:
+                return
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+            # Only index complete lines; a partial tail is picked up next time
+            end = data.rfind(b"\n") + 1
+            rows = []
+            for line in data[:end].decode('utf-8', 'ignore').splitlines():
+                h, sep, pwd = line.partition(":")
+                if sep and h:
+                    rows.append((normalize_hash(h), decode_password(pwd)))
+            self._db.executemany("INSERT OR IGNORE INTO pot VALUES (?, ?)", rows)
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('offset', ?)", (offset + end,))
+            self._db.commit()
+
+    def lookup(self, hashes):
+        """Return {hash: password} for every given hash already in the potfile
+
+        Keys are returned exactly as passed in.
+        """
+        keys = {}
+        for h in hashes:
+            keys.setdefault(normalize_hash(h), []).append(h)
+        found = {}
+        with self._lock:
+            self._db.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (hash TEXT PRIMARY KEY)")
+            items = list(keys)
+            for i in range(0, len(items), LOOKUP_BATCH):
+                self._db.execute("DELETE FROM wanted")
+                self._db.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((k,) for k in items[i:i + LOOKUP_BATCH]))
+                for key, pwd in self._db.execute("SELECT pot.hash, pot.password FROM wanted JOIN pot ON pot.hash = wanted.hash"):
+                    for h in keys[key]:
+                        found[h] = pwd
+            self._db.commit()  # Release the read lock for other processes
+        return found
+
+    def passwords(self):
+        """Return the password of every cracked hash, as bytes (repeats included)"""
+        with self._lock:
+            rows = self._db.execute("SELECT password FROM pot").fetchall()
+        return [pwd.encode('utf-8') for pwd, in rows]
+
+    def add_many(self, cracked):
+        """Append {hash: password} pairs to the potfile and index them"""
+        if not cracked:
+            return
+        lines = "".join(f"{normalize_hash(h)}:{encode_password(p)}\n" for h, p in cracked.items()).encode('utf-8')
+        with self._lock:
+            with open(self.path, "ab+") as f:
+                # Never glue a new entry onto a hand-written line missing its newline
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        lines = b"\n" + lines
+                f.write(lines)
+        self.sync()
+
+    def add(self, hash_value, password):
+        """Append a single crack to the potfile"""
+        self.add_many({hash_value: password})
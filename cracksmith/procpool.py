@@ -0,0 +1,142 @@
+"""
+Process-based cracking engine that sidesteps the GIL for fast hashes
+"""
+import queue
+import time
+import signal
+import multiprocessing as mp
+
+from cracksmith.dispatch import ChunkDispatcher, DEFAULT_CHUNK
+from cracksmith.engines import PLUGINS, EngineSet, load_plugins
+from cracksmith.rules import RuleSet
+
+SAMPLE_EVERY = 1000
+SHUTDOWN_TIMEOUT = 5.0  # Seconds workers get to finish before they are terminated
+
+
+def _work(source, targets, cursor, end, chunk_size, done, rules, counts, slot, stop, events, plugins=(), profiler=None, cprofile=None):
+    """Process entry point: crack chunks claimed from the shared cursor until done"""
+    # The parent owns Ctrl+C and tells workers to stop through the stop event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    load_plugins(plugins, discover=False)  # Spawned workers start without the parent's plugins
+    args = (source, targets, cursor, end, chunk_size, done, rules, counts, slot, stop, events, profiler)
+    if cprofile:
+        from cracksmith.profiler import run_profiled
+        return run_profiled(cprofile, _crack, *args)
+    _crack(*args)
+
+
+def _crack(source, targets, cursor, end, chunk_size, done, rules, counts, slot, stop, events, profiler):
+    matcher, remaining = EngineSet(targets), len(targets)
+    rules = RuleSet(rules) if rules else None
+
+    def found(target, pwd, offset):
+        events.put(("found", target, pwd.decode('utf-8', 'ignore'), offset))
+
+    def update(pwds, chunk):
+        before = counts[slot]
+        counts[slot] = before + len(pwds)
+        if pwds and counts[slot] // SAMPLE_EVERY != before // SAMPLE_EVERY:
+            events.put(("sample", pwds[-1].decode('utf-8', 'ignore')[:25]))
+        events.put(("chunk", chunk.start, chunk.end))
+
+    with source:
+        dispatcher = ChunkDispatcher(source, end=end, chunk_size=chunk_size, cursor=cursor, done=done, rules=rules)
+        next_chunk = dispatcher.next_chunk
+        if profiler:
+            next_chunk = profiler.next_chunk(slot, dispatcher)
+            matcher, found, update = (profiler.wrap(slot, stage, fn) for stage, fn in (("hash", matcher), ("record", found), ("update", update)))
+        while remaining and not stop.is_set():
+            chunk = next_chunk()
+            if chunk is None:
+                break
+            pwds = chunk.candidates
+            for j, target in matcher(pwds):
+                found(target, pwds[j], source.line_offset(chunk.offset, j // chunk.fanout))
+                remaining -= 1
+                if not remaining:
+                    pwds = pwds[:j + 1]
+                    break
+            update(pwds, chunk)
+
+
+class ProcessPool:
+    """Runs workers in separate processes that claim slices of the wordlist from a shared cursor
+
+    source is a Wordlist or Mask; each process maps or addresses it itself.
+    Workers stop at end if given, e.g. at the end of a distributed lease.
+    Streaming sources are decompressed once, in this process, and their
+    blocks are shared with the workers through the feed's queue.
+    With profile, stage timers are collected in self.profiler; with
+    cprofile (a CProfileRun) every worker process runs under cProfile.
+    """
+
+    def __init__(self, source, targets, workers, start=0, chunk_size=DEFAULT_CHUNK, done=(), rules=None, end=None,
+                 profile=False, cprofile=None):
+        ctx = mp.get_context()
+        if profile:
+            from cracksmith.profiler import Profiler
+            self.profiler = Profiler(workers, ctx.RawArray('q', Profiler.size(workers)))
+        else:
+            self.profiler = None
+        self.feed = source.feed(start, chunk_size, done, ctx) if getattr(source, "streaming", False) else None
+        self.cursor = self.feed.reader() if self.feed else ctx.Value('q', start)
+        self.counts = ctx.RawArray('q', workers)
+        self.stop = ctx.Event()
+        self.events = ctx.Queue()
+        self.procs = [
+            ctx.Process(target=_work, daemon=True, args=(
+                source, targets, self.cursor, end, chunk_size, list(done), rules.lines if rules else None,
+                self.counts, slot, self.stop, self.events, list(PLUGINS), self.profiler, cprofile and cprofile.part()))
+            for slot in range(workers)
+        ]
+
+    def start(self):
+        """Start every worker process"""
+        for p in self.procs:
+            p.start()
+
+    def alive(self):
+        """Return True while any worker process is still running"""
+        return any(p.is_alive() for p in self.procs)
+
+    def refresh(self, stats=None, log=None):
+        """Fold queued worker events into a CrackerStats counting from self.counts
+
+        Completed chunks are reported to log (a checkpoint RangeLog) if given.
+        Without stats the events are only drained, as when benchmarking.
+        """
+        while True:
+            try:
+                kind, *data = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if stats is None:
+                continue
+            if kind == "found":
+                stats.record(*data)
+            elif kind == "chunk":
+                if log is not None:
+                    log.complete(*data)
+            else:
+                stats.last_passwords = [data[0]] + stats.last_passwords[:3]
+        if stats is not None and stats.done:
+            self.stop.set()
+
+    def shutdown(self, stats=None, log=None):
+        """Stop the workers, wait for them and collect their final results"""
+        self.stop.set()
+        if self.feed:
+            self.feed.close()
+        # A worker flushing its last events into a full queue only exits once
+        # the queue is drained, so keep draining while waiting for it
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        while any(p.is_alive() for p in self.procs) and time.monotonic() < deadline:
+            self.refresh(stats, log)
+            for p in self.procs:
+                p.join(timeout=0.05)
+        self.refresh(stats, log)
+        for p in self.procs:
+            if p.is_alive():
+                p.terminate()
+        self.refresh(stats, log)
@@ -0,0 +1,160 @@
+"""
+Opt-in profiling of cracking runs (--profile, --cprofile)
+
+Stage timers are kept per chunk, never per candidate: each worker adds the
+nanoseconds and calls of every stage to its own row of a flat array, so
+timing needs no lock and works across processes through a shared array.
+Nothing is instrumented unless profiling is asked for; callers swap in the
+timed callables from wrap() instead of testing a flag on the hot path.
+"""
+import os
+import json
+import time
+import cProfile
+import pstats
+from array import array
+
+# Worker stages, in the order a chunk goes through them
+WORKER_STAGES = ("claim", "read", "split", "hash", "record", "update")
+# Stages of the main loop that polls workers and redraws progress
+MAIN_STAGES = ("refresh", "checkpoint", "render")
+STAGES = WORKER_STAGES + MAIN_STAGES
+DESCRIPTIONS = {
+    "claim": "cursor lock / feed queue wait",
+    "read": "wordlist I/O",
+    "split": "line split and rules",
+    "hash": "hashing and compare",
+    "record": "decode and record cracks",
+    "update": "attempt counters, progress events",
+    "refresh": "collect worker events",
+    "checkpoint": "resume checkpoints",
+    "render": "progress rendering",
+}
+CPROFILE_TOP = 15
+
+
+class Profiler:
+    """Per-stage time and call counters, one row per worker plus one for the main loop
+
+    Pass a shared array of Profiler.size(workers) slots (e.g. a
+    multiprocessing.RawArray) to collect from worker processes.
+    """
+
+    def __init__(self, workers=1, slots=None):
+        self.workers = workers
+        self.slots = slots if slots is not None else array('q', [0] * self.size(workers))
+
+    @staticmethod
+    def size(workers):
+        return 2 * len(STAGES) * (workers + 1)
+
+    def wrap(self, slot, stage, fn):
+        """Return fn timed as a stage of a worker's slot (slot None is the main loop)"""
+        slots, clock = self.slots, time.perf_counter_ns
+        i = 2 * ((self.workers if slot is None else slot) * len(STAGES) + STAGES.index(stage))
+
+        def timed(*args):
+            t0 = clock()
+            result = fn(*args)
+            slots[i] += clock() - t0
+            slots[i + 1] += 1
+            return result
+        return timed
+
+    def next_chunk(self, slot, dispatcher):
+        """Return a timed stand-in for dispatcher.next_chunk"""
+        claim = self.wrap(slot, "claim", dispatcher.claim)
+        read = self.wrap(slot, "read", dispatcher.read)
+        split = self.wrap(slot, "split", dispatcher.chunk)
+
+        def next_chunk():
+            claimed = claim()
+            return None if claimed is None else split(*read(*claimed))
+        return next_chunk
+
+    def collect(self, totals=None):
+        """Add this run's {stage: [nanoseconds, calls]} to totals and return them"""
+        totals = totals if totals is not None else {stage: [0, 0] for stage in STAGES}
+        row = 2 * len(STAGES)
+        for base in range(0, len(self.slots), row):
+            for n, stage in enumerate(STAGES):
+                totals[stage][0] += self.slots[base + 2 * n]
+                totals[stage][1] += self.slots[base + 2 * n + 1]
+        return totals
+
+
+def breakdown(totals):
+    """Return (stage, description, seconds, calls, µs per call, percent of its group) rows
+
+    Worker stages are shares of all worker time, main stages of main-loop time.
+    """
+    rows = []
+    for group in (WORKER_STAGES, MAIN_STAGES):
+        spent = sum(totals[stage][0] for stage in group) or 1
+        for stage in group:
+            ns, calls = totals[stage]
+            rows.append((stage, DESCRIPTIONS[stage], ns / 1e9, calls, ns / 1e3 / calls if calls else 0.0, 100 * ns / spent))
+    return rows
+
+
+def write_dump(path, totals, run):
+    """Write the stage totals and run facts (attempts, elapsed, ...) as JSON"""
+    doc = {
+        "run": run,
+        "stages": {stage: {"seconds": round(ns / 1e9, 6), "calls": calls, "group": "worker" if stage in WORKER_STAGES else "main"}
+                   for stage, (ns, calls) in totals.items()},
+    }
+    with open(path, "w") as f:
+        json.dump(doc, f, indent=2)
+
+
+class CProfileRun:
+    """cProfile for every worker thread and process, merged into one pstats file
+
+    cProfile only sees the thread it runs in, so each worker thread runs
+    under its own profiler and each worker process dumps to a numbered path.<n> part.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.profiles = []
+        self.parts = []
+
+    def enable(self):
+        """Profile the calling thread (e.g. the main loop) until save()"""
+        profile = cProfile.Profile()
+        self.profiles.append(profile)
+        profile.enable()
+
+    def runcall(self, fn, *args):
+        """Call fn under a new profiler kept for the merged report"""
+        profile = cProfile.Profile()
+        self.profiles.append(profile)
+        return profile.runcall(fn, *args)
+
+    def part(self):
+        """Return the file a worker process dumps its profile to"""
+        path = f"{self.path}.{len(self.parts)}"
+        self.parts.append(path)
+        return path
+
+    def save(self):
+        """Merge every profile into self.path and return the pstats.Stats, or None"""
+        parts = [p for p in self.parts if os.path.exists(p)]
+        sources = self.profiles + parts
+        if not sources:
+            return None
+        stats = pstats.Stats(*sources)
+        stats.dump_stats(self.path)
+        for p in parts:
+            os.remove(p)
+        return stats
+
+
+def run_profiled(path, fn, *args):
+    """Call fn under cProfile, dumping the profile to path (for worker processes)"""
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(fn, *args)
+    finally:
+        profile.dump_stats(path)
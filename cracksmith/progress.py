@@ -0,0 +1,80 @@
+"""
+Headless progress reporting as JSON lines
+"""
+import re
+import sys
+import json
+import time
+
+MARKUP = re.compile(r"\[/?[a-z0-9 .#_-]*\]")
+
+
+class PlainConsole:
+    """Console stand-in that prints Rich-style messages as plain text to stderr"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+
+    def print(self, message="", **kwargs):
+        print(MARKUP.sub("", str(message)), file=self.stream, flush=True)
+
+
+class JsonlProgress:
+    """Writes one compact JSON progress record per interval for a cracking job"""
+
+    def __init__(self, stats, hash_type, run, out=None, interval=2.0):
+        self.stats, self.hash_type, self.run = stats, hash_type, run
+        self.out = out or sys.stdout
+        self.interval = interval
+        self._last = 0.0
+
+    def __enter__(self):
+        self.write("start")
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def record(self, event):
+        stats = self.stats
+        rec = {
+            "event": event,
+            "ts": round(time.time(), 3),
+            "hash_type": self.hash_type,
+            "targets": stats.targets,
+            "cracked": len(stats.cracked),
+            "attempts": stats.attempts,
+            "total": stats.total_passwords,
+            "rate": round(stats.rate, 1),
+            "elapsed": round(stats.elapsed, 1),
+            "eta": stats.eta_seconds,
+            "cpu": stats.cpu_usage,
+            "mem": stats.mem_usage,
+            "wordlist": self.run["wordlist"],
+        }
+        if self.run.get("rules"):
+            rec["rules"] = self.run["rules"]
+        if self.run.get("nodes"):
+            rec["nodes"] = self.run["nodes"]
+        if self.run.get("target"):
+            rec["target"] = self.run["target"]
+        if stats.has_gpu:
+            rec["gpu"] = stats.gpu_usage
+        return rec
+
+    def write(self, event, **extra):
+        rec = self.record(event)
+        rec.update(extra)
+        self.out.write(json.dumps(rec, separators=(",", ":")) + "\n")
+        self.out.flush()
+        self._last = time.monotonic()
+
+    def update(self):
+        """Emit a progress record if the interval has elapsed"""
+        if time.monotonic() - self._last >= self.interval:
+            self.write("progress")
+
+    def finish(self, status):
+        """Emit the final record of the job, including every cracked password"""
+        found = {t.decode(): p for t, p in self.stats.cracked.items()}
+        self.write("done", status=status, found=found)
@@ -0,0 +1,214 @@
+"""
+Probability-ordered wordlists: rank candidates by likelihood before cracking
+
+A slow hash only gets through a few thousand candidates per second, so the
+order of the list decides how soon a hash falls. Every unique candidate is
+scored in bits (-log2 of its probability) by a model trained on cracked
+passwords, minus log2 of how often it occurs in the list, and the list is
+written as a compiled wordlist in increasing cost order:
+
+    frequency   occurrences in the list only
+    markov      order-2 character Markov model (with backoff) of the potfile
+    pattern     potfile frequency of the l/u/d/s character-class pattern,
+                spread uniformly over the characters of each class
+
+Scores are quantised into COST_BUCKETS buckets, so the sort is a stable
+two-pass bucket sort: the first pass scores and deduplicates, the second
+writes each candidate straight to its final place in a mapped output file.
+Candidates of equal cost keep their file order.
+"""
+import os
+import math
+import mmap
+import zlib
+import hashlib
+from array import array
+from collections import Counter
+
+from cracksmith.compiled import HEADER, MAGIC, VERSION, COMPILE_BLOCK
+
+RESOLUTION = 16  # Buckets per bit of cost
+COST_BUCKETS = 1 << 16
+SMOOTHING = 1.0  # Weight of the lower-order estimate in each backoff step
+HOLDOUT = 5  # One in HOLDOUT potfile passwords is kept out of training to measure the ranking
+START, END = b"\0", b"\n"
+
+
+class MarkovModel:
+    """Order-2 byte Markov model, interpolated down to bigram and unigram estimates"""
+
+    def __init__(self, passwords):
+        self.tri, self.bi, self.uni = Counter(), Counter(), Counter()
+        self.ctx2, self.ctx1 = Counter(), Counter()
+        for pwd in passwords:
+            padded = START * 2 + pwd + END
+            for i in range(len(padded) - 2):
+                self.tri[padded[i:i + 3]] += 1
+                self.bi[padded[i + 1:i + 3]] += 1
+                self.uni[padded[i + 2:i + 3]] += 1
+                self.ctx2[padded[i:i + 2]] += 1
+                self.ctx1[padded[i + 1:i + 2]] += 1
+        self.total = sum(self.uni.values())
+        self._cache = {}
+
+    def _cost(self, gram):
+        p0 = (self.uni[gram[2:]] + 1) / (self.total + 256)
+        p1 = (self.bi[gram[1:]] + SMOOTHING * p0) / (self.ctx1[gram[1:2]] + SMOOTHING)
+        p2 = (self.tri[gram] + SMOOTHING * p1) / (self.ctx2[gram[:2]] + SMOOTHING)
+        self._cache[gram] = cost = -math.log2(p2)
+        return cost
+
+    def cost(self, word):
+        """Return the cost of a candidate in bits"""
+        padded, cache, total = START * 2 + word + END, self._cache, 0.0
+        for i in range(len(padded) - 2):
+            gram = padded[i:i + 3]
+            c = cache.get(gram)
+            total += self._cost(gram) if c is None else c
+        return total
+
+
+# Character classes by byte, with the number of characters each one stands for
+CLASSES = bytes(
+    ord("l") if 97 <= b <= 122 else ord("u") if 65 <= b <= 90 else ord("d") if 48 <= b <= 57 else
+    ord("s") if b < 128 else ord("h") for b in range(256))
+CLASS_SIZES = {b"l": 26, b"u": 26, b"d": 10, b"s": 33, b"h": 128}
+
+
+class PatternModel:
+    """Character-class pattern frequencies, backing off to independent class frequencies"""
+
+    def __init__(self, passwords):
+        self.patterns = Counter(pwd.translate(CLASSES) for pwd in passwords)
+        self.total = sum(self.patterns.values())
+        classes = Counter()
+        for pattern, n in self.patterns.items():
+            for c in CLASS_SIZES:
+                classes[c] += pattern.count(c) * n
+            classes[END] += n
+        size = sum(classes.values()) + len(CLASS_SIZES) + 1
+        self.class_cost = {c: -math.log2((classes[c] + 1) / size) for c in (*CLASS_SIZES, END)}
+        self._cache = {}
+
+    def _cost(self, pattern):
+        counts = {c: pattern.count(c) for c in CLASS_SIZES}
+        backoff = 2 ** -(self.class_cost[END] + sum(n * self.class_cost[c] for c, n in counts.items()))
+        p = (self.patterns[pattern] + SMOOTHING * backoff) / (self.total + SMOOTHING)
+        self._cache[pattern] = cost = -math.log2(p) + sum(n * math.log2(CLASS_SIZES[c]) for c, n in counts.items())
+        return cost
+
+    def cost(self, word):
+        """Return the cost of a candidate in bits"""
+        pattern = word.translate(CLASSES)
+        c = self._cache.get(pattern)
+        return self._cost(pattern) if c is None else c
+
+
+MODELS = {"frequency": None, "markov": MarkovModel, "pattern": PatternModel}
+
+
+def split_holdout(passwords):
+    """Split cracked passwords into (training, held out), stably by content"""
+    train, test = [], []
+    for pwd in passwords:
+        (test if zlib.crc32(pwd) % HOLDOUT == 0 else train).append(pwd)
+    return train, test
+
+
+def train(method, passwords):
+    """Return the model for a ranking method trained on passwords (None for frequency)"""
+    if method not in MODELS:
+        raise ValueError(f"unknown ranking method {method!r}, expected one of {', '.join(MODELS)}")
+    return MODELS[method](passwords) if MODELS[method] else None
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else None
+
+
+def rank_wordlist(src, dst, model=None, holdout=()):
+    """Write src into dst as a compiled wordlist ordered by increasing cost
+
+    model scores candidates (None ranks by frequency alone). holdout is a
+    list of cracked passwords kept out of training; the returned report
+    compares their positions before and after ranking, one per cracked
+    hash, as expected guesses to crack.
+    """
+    from cracksmith.dispatch import ChunkDispatcher
+    from cracksmith.wordlist import open_wordlist
+
+    wanted = Counter(holdout)
+    uids, lengths, costs, counts, tracked = {}, array('I'), array('d'), array('I'), {}
+    lines = 0
+    with open_wordlist(src) as source:
+        # Pass 1: deduplicate, count and score every candidate
+        cost = model.cost if model else None
+        for chunk in ChunkDispatcher(source, chunk_size=COMPILE_BLOCK):
+            lines += len(chunk.candidates)
+            for w in chunk.candidates:
+                u = uids.get(w)
+                if u is not None:
+                    counts[u] += 1
+                    continue
+                u = uids[w] = len(lengths)
+                lengths.append(len(w))
+                costs.append(cost(w) if cost else 0.0)
+                counts.append(1)
+                if w in wanted:
+                    tracked[u] = wanted[w]
+        kept = len(lengths)
+
+        # Bucket every candidate and lay the buckets out one after another
+        buckets = array('H', (min(COST_BUCKETS - 1, max(0, int((c - math.log2(n)) * RESOLUTION) + COST_BUCKETS // 2))
+                              for c, n in zip(costs, counts)))
+        del costs, counts
+        slots, sizes = [0] * COST_BUCKETS, [0] * COST_BUCKETS
+        for b, n in zip(buckets, lengths):
+            slots[b] += 1
+            sizes[b] += n + 1
+        slot = pos = 0
+        data = HEADER.size
+        for b in range(COST_BUCKETS):
+            slots[b], slot = slot, slot + slots[b]
+            sizes[b], pos = data + pos, pos + sizes[b]
+        end = data + pos
+
+        # Pass 2: write each candidate to its final position
+        tmp, ranks = dst + ".tmp", {}
+        with open(tmp, 'w+b') as out:
+            out.truncate(end + 8 * (kept + 1))
+            mm = mmap.mmap(out.fileno(), 0)
+            offsets = memoryview(mm)[end:].cast('Q')
+            written = bytearray(kept)
+            for chunk in ChunkDispatcher(source, chunk_size=COMPILE_BLOCK):
+                for w in chunk.candidates:
+                    u = uids[w]
+                    if written[u]:
+                        continue
+                    written[u] = 1
+                    b = buckets[u]
+                    p, k = sizes[b], slots[b]
+                    mm[p:p + len(w)] = w
+                    mm[p + len(w)] = 10
+                    offsets[k] = p
+                    sizes[b], slots[b] = p + len(w) + 1, k + 1
+                    if u in tracked:
+                        ranks[u] = k
+            offsets[kept] = end
+            offsets.release()
+            digest = hashlib.sha256()
+            for i in range(data, end, COMPILE_BLOCK):
+                digest.update(mm[i:min(end, i + COMPILE_BLOCK)])
+            mm[:HEADER.size] = HEADER.pack(MAGIC, VERSION, kept, data, end, digest.digest())
+            mm.close()
+    os.replace(tmp, dst)
+
+    before = [u + 1 for u, n in tracked.items() for _ in range(n)]
+    after = [ranks[u] + 1 for u, n in tracked.items() for _ in range(n)]
+    return {
+        "lines": lines, "kept": kept, "held_out": len(holdout), "evaluated": len(before),
+        "mean_before": sum(before) / len(before) if before else None,
+        "mean_after": sum(after) / len(after) if after else None,
+        "median_before": _median(before), "median_after": _median(after),
+    }
@@ -0,0 +1,107 @@
+"""
+Hashcat-style mangling rules applied lazily to wordlist chunks
+
+A rule line is a sequence of functions applied left to right, e.g.
+"c $1 $2" capitalises a word and appends "12". Every rule always yields
+exactly one candidate, so the keyspace is exactly words x rules.
+"""
+import hashlib
+
+POSITIONS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _pos(c):
+    n = POSITIONS.find(c)
+    if n < 0:
+        raise ValueError(f"invalid position {c!r}")
+    return n
+
+
+def _toggle_at(w, n):
+    return w[:n] + w[n:n + 1].swapcase() + w[n + 1:] if n < len(w) else w
+
+
+# op -> (argument kinds, function); "c" is a literal character, "n" a position
+OPS = {
+    ":": ("", lambda w: w),
+    "l": ("", bytes.lower),
+    "u": ("", bytes.upper),
+    "c": ("", bytes.capitalize),
+    "C": ("", lambda w: w[:1].lower() + w[1:].upper()),
+    "t": ("", bytes.swapcase),
+    "r": ("", lambda w: w[::-1]),
+    "d": ("", lambda w: w + w),
+    "f": ("", lambda w: w + w[::-1]),
+    "{": ("", lambda w: w[1:] + w[:1]),
+    "}": ("", lambda w: w[-1:] + w[:-1]),
+    "[": ("", lambda w: w[1:]),
+    "]": ("", lambda w: w[:-1]),
+    "k": ("", lambda w: w[1:2] + w[:1] + w[2:]),
+    "q": ("", lambda w: bytes(b for b in w for _ in (0, 1))),
+    "$": ("c", lambda w, c: w + c),
+    "^": ("c", lambda w, c: c + w),
+    "@": ("c", lambda w, c: w.replace(c, b"")),
+    "T": ("n", _toggle_at),
+    "D": ("n", lambda w, n: w[:n] + w[n + 1:]),
+    "'": ("n", lambda w, n: w[:n]),
+    "p": ("n", lambda w, n: w * (n + 1)),
+    "z": ("n", lambda w, n: w[:1] * n + w),
+    "Z": ("n", lambda w, n: w + w[-1:] * n),
+    "s": ("cc", lambda w, x, y: w.replace(x, y)),
+    "i": ("nc", lambda w, n, c: w[:n] + c + w[n:]),
+    "o": ("nc", lambda w, n, c: w[:n] + c + w[n + 1:] if n < len(w) else w),
+}
+
+
+def compile_rule(line):
+    """Compile one rule line into a function mapping a word to a candidate"""
+    steps, i = [], 0
+    while i < len(line):
+        op = line[i]
+        i += 1
+        if op == " ":
+            continue
+        if op not in OPS:
+            raise ValueError(f"unknown rule function {op!r}")
+        kinds, fn = OPS[op]
+        if i + len(kinds) > len(line):
+            raise ValueError(f"rule function {op!r} is missing arguments")
+        args = [_pos(line[i + k]) if kind == "n" else line[i + k].encode('latin-1') for k, kind in enumerate(kinds)]
+        i += len(kinds)
+        steps.append((fn, args))
+
+    def apply(word):
+        for fn, args in steps:
+            word = fn(word, *args)
+        return word
+    return apply
+
+
+class RuleSet:
+    """Compiled rule lines that expand each word into len(rules) candidates"""
+
+    def __init__(self, lines):
+        self.lines = [line for line in lines if line and not line.startswith("#")]
+        self.rules = []
+        for n, line in enumerate(self.lines, 1):
+            try:
+                self.rules.append(compile_rule(line))
+            except ValueError as e:
+                raise ValueError(f"rule {n} ({line!r}): {e}") from None
+        if not self.rules:
+            raise ValueError("no rules defined")
+        self.digest = hashlib.sha1("\n".join(self.lines).encode()).hexdigest()
+
+    @classmethod
+    def load(cls, path):
+        """Read a rule file, one rule per line"""
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            return cls([line.rstrip("\r\n") for line in f])
+
+    def __len__(self):
+        return len(self.rules)
+
+    def expand(self, words):
+        """Return every rule applied to every word, word-major"""
+        rules = self.rules
+        return [rule(w) for w in words for rule in rules]
@@ -0,0 +1,78 @@
+"""
+Rich terminal UI for CrackSmith
+
+Only imported when the live screen is shown, so headless runs never load Rich.
+"""
+from datetime import timedelta
+from itertools import cycle
+from rich.console import Console, Group
+from rich.panel import Panel
+from rich.table import Table
+from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn
+from rich.text import Text
+from rich.live import Live
+
+spinner = cycle(["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"])
+
+
+def make_console():
+    return Console()
+
+
+def render_stats(stats, spinner_char, hash_type, run):
+    header = Panel(Text(f"{spinner_char} CrackSmith", justify="center", style="bold red"), expand=False)
+    info = Table.grid(expand=True)
+    info.add_column(justify="right", style="bold")
+    info.add_column()
+    info.add_row("Hash Type:", hash_type)
+    info.add_row("Wordlist:", run["wordlist"])
+    if run.get("rules"): info.add_row("Rules:", run["rules"])
+
+    stats_table = Table.grid(expand=True)
+    stats_table.add_column(justify="right", style="cyan")
+    stats_table.add_column()
+    stats_table.add_row("Attempts:", f"{stats.attempts:,}")
+    if stats.targets > 1: stats_table.add_row("Cracked:", f"{len(stats.cracked):,} / {stats.targets:,}")
+    stats_table.add_row("Left:", f"{max(0, stats.left):,}")
+    stats_table.add_row("Speed:", f"{stats.rate:,.1f}/s")
+    if run.get("nodes"): stats_table.add_row("Nodes:", run["nodes"])
+    else: stats_table.add_row("Workers:" if run["engine"] == "process" else "Threads:", f"{run['workers']} / {run['max_workers']}")
+    stats_table.add_row("Elapsed:", str(timedelta(seconds=int(stats.elapsed)))[:10])
+    stats_table.add_row("ETA:", stats.eta)
+
+    system = Table.grid(); system.add_column()
+    load = f"CPU {stats.cpu_usage:.1f}% | RAM {stats.mem_usage:.1f}%"
+    if stats.has_gpu: load += f" | GPU {stats.gpu_usage:.1f}%"
+    system.add_row(f"[green]{load}[/green]")
+
+    sample = Panel(Text("\n".join([f"→ {p}" for p in stats.last_passwords]) or "(no samples yet)", style="yellow"), title="Last Attempts")
+    progress = Progress(TextColumn("[progress.description]{task.description}"), BarColumn(), TextColumn("[progress.percentage]{task.percentage:>3.1f}%"), TimeRemainingColumn())
+    task = progress.add_task("Cracking", total=stats.total_passwords, completed=stats.skipped + stats.attempts)
+
+    return Group(header, info, stats_table, system, progress, sample), progress, task
+
+
+class LiveView:
+    """Full-screen Rich view of one cracking job, refreshed from the main loop"""
+
+    def __init__(self, stats, hash_type, run):
+        self.stats, self.hash_type, self.run = stats, hash_type, run
+        self.live = Live(self.render(), refresh_per_second=5, screen=True)
+
+    def render(self):
+        layout, progress, task = render_stats(self.stats, next(spinner), self.hash_type, self.run)
+        progress.update(task, completed=self.stats.skipped + self.stats.attempts)
+        return layout
+
+    def __enter__(self):
+        self.live.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self.live.__exit__(*exc)
+
+    def update(self):
+        self.live.update(self.render())
+
+    def finish(self, status):
+        pass
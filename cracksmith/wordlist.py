@@ -0,0 +1,163 @@
+"""
+Memory-mapped wordlist access for CrackSmith
+"""
+import os
+import json
+import mmap
+import threading
+
+COUNT_SUFFIX = ".count"
+SCAN_BLOCK = 1 << 24
+READ_BLOCK = 1 << 16
+
+
+def open_wordlist(path):
+    """Open a text, compiled or compressed wordlist, detected by its magic bytes"""
+    from cracksmith.compiled import CompiledWordlist, is_compiled
+    from cracksmith.compressed import CompressedWordlist, detect_compression
+    if is_compiled(path):
+        return CompiledWordlist(path)
+    return CompressedWordlist(path) if detect_compression(path) else Wordlist(path)
+
+
+def read_count(path, size, mtime):
+    """Return the line count cached next to a wordlist, or None if missing or stale"""
+    try:
+        with open(path + COUNT_SUFFIX) as f:
+            meta = json.load(f)
+        if meta.get("size") == size and meta.get("mtime") == mtime:
+            return meta.get("lines")
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def write_count(path, size, mtime, lines):
+    """Cache the line count of a wordlist in its sidecar file, if writable"""
+    try:
+        with open(path + COUNT_SUFFIX, "w") as f:
+            json.dump({"size": size, "mtime": mtime, "lines": lines}, f)
+    except OSError:
+        pass
+
+
+class Wordlist:
+    """Read-only, memory-mapped wordlist that hands out candidates lazily"""
+    unit = 1  # Offsets are bytes
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        st = os.fstat(self._file.fileno())
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+        # mmap refuses empty files; an empty bytes object offers the same find/slice API
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.total = None
+        self._count_lock = threading.Lock()
+        self._callbacks = []
+        self._counter = None
+
+    def __reduce__(self):
+        # Processes started with spawn reopen the file instead of pickling the map
+        return (Wordlist, (self.path,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Unmap the wordlist and close the underlying file"""
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def align(self, pos):
+        """Return the offset of the first line starting at or after pos"""
+        if pos <= 0:
+            return 0
+        if pos >= self.size:
+            return self.size
+        nl = self._mm.find(b"\n", pos - 1)
+        return self.size if nl < 0 else nl + 1
+
+    def span(self, start, end):
+        """Return (offset, data) holding every line that starts inside [start, end)"""
+        a, b = self.align(start), self.align(end)
+        return a, self._mm[a:b]
+
+    @staticmethod
+    def split(data):
+        """Split a span into stripped candidates"""
+        lines = data.split(b"\n")
+        if lines and not lines[-1]:
+            lines.pop()
+        return [line.strip() for line in lines]
+
+    def candidates(self, offset=0, index=0):
+        """Yield (index, candidate) pairs lazily, starting at a line offset"""
+        while offset < self.size:
+            start, data = self.span(offset, offset + READ_BLOCK)
+            for pwd in self.split(data):
+                yield index, pwd
+                index += 1
+            offset = start + len(data)
+
+    def line_offset(self, offset, n):
+        """Return the offset of the line n lines after the line starting at offset"""
+        for _ in range(n):
+            offset = self._mm.find(b"\n", offset) + 1
+        return offset
+
+    def index_at(self, offset):
+        """Return the number of lines that start before a line offset"""
+        count, pos = 0, 0
+        while pos < offset:
+            end = min(pos + SCAN_BLOCK, offset)
+            count += self._mm[pos:end].count(b"\n")
+            pos = end
+        return count
+
+    def offset_of(self, index):
+        """Return the byte offset of line number index without reading it into memory"""
+        pos = 0
+        while index > 0 and pos < self.size:
+            block = self._mm[pos:pos + SCAN_BLOCK]
+            n = block.count(b"\n")
+            if n < index:
+                index -= n
+                pos += len(block)
+                continue
+            return self.line_offset(pos, index)
+        return self.size if index > 0 else pos
+
+    def count_lines(self):
+        """Count lines with a block-wise newline scan, caching the result in a sidecar file"""
+        lines = read_count(self.path, self.size, self.mtime)
+        if lines is None:
+            lines = self.index_at(self.size)
+            if self.size and self._mm[self.size - 1:self.size] != b"\n":
+                lines += 1
+            write_count(self.path, self.size, self.mtime, lines)
+        return lines
+
+    def _count(self):
+        total = self.count_lines()
+        with self._count_lock:
+            self.total = total
+            callbacks, self._callbacks = self._callbacks, []
+        for cb in callbacks:
+            cb(total)
+
+    def count_async(self, callback):
+        """Count lines in a background thread and hand the total to callback"""
+        with self._count_lock:
+            if self.total is None:
+                self._callbacks.append(callback)
+                if self._counter is None:
+                    self._counter = threading.Thread(target=self._count, daemon=True)
+                    self._counter.start()
+                return
+        callback(self.total)